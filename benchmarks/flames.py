@@ -0,0 +1,281 @@
+"""Benchmark the /flames pages over synthetic voice sessions.
+
+Sessions are generated with a fixed seed and loaded, with their hourly
+rollup, into a SQLite database through the embedded storage backend
+(``bonefire_sqlite``), so no database server is needed. Every page is then
+requested through Flask's test client, cold (response cache cleared) and
+warm (cached, and revalidated with ``If-None-Match``)::
+
+    python benchmarks/flames.py --scales 10k 100k --json flames.json
+
+Generated databases are kept in ``--data-dir`` and reused by later runs on
+the same day with the same seed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bonefire_flask  # noqa: E402
+import bonefire_sqlite  # noqa: E402
+from bonefire_profiler import QUERY_PROFILER  # noqa: E402
+from bonefire_rollup import UPSERT_ROLLUP_SQL, rollup_rows  # noqa: E402
+from bonefire_sqlite import SQLitePool  # noqa: E402
+
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+LOAD_CHUNK = 50_000
+HISTORY_DAYS = 365
+CHANNELS = 12
+# relative activity per hour of day: quiet mornings, busy late evenings
+HOUR_WEIGHTS = np.array(
+    [6, 4, 2, 1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 6, 6, 7, 8, 9, 11, 13, 15, 16, 14, 10], dtype=float
+)
+# Monday..Sunday
+WEEKDAY_WEIGHTS = np.array([0.9, 0.9, 0.9, 1.0, 1.2, 1.4, 1.3])
+
+INSERT_SESSION_SQL = """
+    INSERT IGNORE INTO voice_sessions
+        (user_id, username, channel_id, channel_name, start_time, end_time, duration_sec, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+# ---------- Synthetic data ----------
+def user_count(rows):
+    return int(min(5000, max(50, rows // 400)))
+
+
+def generate_sessions(rows, seed, now, chunk=LOAD_CHUNK):
+    """Yield lists of ``voice_sessions`` tuples, ``rows`` in total.
+
+    A few users account for most of the time (Zipf-like weights), channels
+    are similarly skewed, start times follow a weekly and daily rhythm over
+    the last ``HISTORY_DAYS`` days and durations are log-normal (median 45
+    minutes, capped at 8 hours).
+    """
+    rng = np.random.default_rng(seed)
+    users = user_count(rows)
+    user_p = 1 / np.arange(1, users + 1) ** 1.1
+    user_p /= user_p.sum()
+    channel_p = 1 / np.arange(1, CHANNELS + 1)
+    channel_p /= channel_p.sum()
+    hour_p = HOUR_WEIGHTS / HOUR_WEIGHTS.sum()
+
+    first_day = (now.date() - timedelta(days=HISTORY_DAYS - 1)).toordinal()
+    day_weights = WEEKDAY_WEIGHTS[[date.fromordinal(first_day + d).weekday() for d in range(HISTORY_DAYS)]]
+    day_p = day_weights / day_weights.sum()
+    first_epoch = int((datetime.fromordinal(first_day) - datetime(1970, 1, 1)).total_seconds())
+    now_epoch = int((now - datetime(1970, 1, 1)).total_seconds())
+
+    remaining = rows
+    while remaining:
+        n = min(chunk, remaining)
+        remaining -= n
+        user_idx = rng.choice(users, size=n, p=user_p)
+        channel_idx = rng.choice(CHANNELS, size=n, p=channel_p)
+        starts = (
+            first_epoch
+            + rng.choice(HISTORY_DAYS, size=n, p=day_p) * 86400
+            + rng.choice(24, size=n, p=hour_p) * 3600
+            + rng.integers(0, 3600, size=n)
+        )
+        durations = np.clip(rng.lognormal(np.log(45 * 60), 1.0, size=n), 60, 8 * 3600).astype(np.int64)
+        # keep every session in the past
+        starts = np.minimum(starts, now_epoch - durations)
+        ends = starts + durations
+
+        start_dt = starts.astype("datetime64[s]").astype(datetime)
+        end_dt = ends.astype("datetime64[s]").astype(datetime)
+        yield [
+            (1000 + u, f"ember{u}", 500 + c, f"pyre{c}", s, e, d, e)
+            for u, c, s, e, d in zip(
+                user_idx.tolist(), channel_idx.tolist(), start_dt, end_dt, durations.tolist()
+            )
+        ]
+
+
+def build_database(path, rows, seed, now):
+    """Create the benchmark database at ``path``; returns load time in seconds."""
+    started = time.perf_counter()
+    conn = bonefire_sqlite.connect(path)
+    # bulk loading is not what is being measured; keep it out of the slow-query log
+    QUERY_PROFILER.enabled = False
+    try:
+        conn.begin()
+        with conn.cursor() as cursor:
+            cursor.executemany(
+                "INSERT IGNORE INTO tracked_users (user_id, username, nickname, role_name) VALUES (%s, %s, %s, %s)",
+                [(1000 + u, f"ember{u}", f"잿불{u}" if u % 3 else None, None) for u in range(user_count(rows))],
+            )
+        conn.commit()
+        for sessions in generate_sessions(rows, seed, now):
+            conn.begin()
+            with conn.cursor() as cursor:
+                cursor.executemany(INSERT_SESSION_SQL, sessions)
+                cursor.executemany(UPSERT_ROLLUP_SQL, rollup_rows((s[0], s[1], s[2], s[4], s[5]) for s in sessions))
+            conn.commit()
+        with conn.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    finally:
+        QUERY_PROFILER.enabled = True
+        conn.close()
+    return time.perf_counter() - started
+
+
+# ---------- Timing ----------
+def timed_get(client, path, headers=None):
+    started = time.perf_counter()
+    response = client.get(path, headers=headers or {})
+    elapsed = time.perf_counter() - started
+    if response.status_code not in (200, 304):
+        raise RuntimeError(f"{path} returned {response.status_code}")
+    return elapsed, response
+
+
+def summarize_ms(samples):
+    samples = sorted(samples)
+    return {
+        "min_ms": round(samples[0] * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+
+def bench_endpoint(client, path, repeat):
+    cache = bonefire_flask.flames_cache
+
+    cold = []
+    for _ in range(repeat):
+        cache.clear()
+        cold.append(timed_get(client, path)[0])
+
+    cache.clear()
+    tracemalloc.start()
+    timed_get(client, path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    _, response = timed_get(client, path)
+    warm = [timed_get(client, path)[0] for _ in range(repeat)]
+    etag = response.headers.get("ETag")
+    revalidate = [timed_get(client, path, {"If-None-Match": etag})[0] for _ in range(repeat)]
+
+    return {
+        "cold": summarize_ms(cold),
+        "warm": summarize_ms(warm),
+        "not_modified": summarize_ms(revalidate),
+        "peak_alloc_kb": round(peak / 1024, 1),
+        "response_kb": round(len(response.get_data()) / 1024, 1),
+    }
+
+
+def top_user(path):
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute(
+            "SELECT user_id FROM voice_rollup_hourly GROUP BY user_id ORDER BY SUM(seconds) DESC LIMIT 1"
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0]
+
+
+def git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scale(label, rows, args, now):
+    path = os.path.join(args.data_dir, f"flames_{label}_seed{args.seed}_{now:%Y%m%d}.sqlite")
+    load_sec = None
+    if not os.path.exists(path) or args.rebuild:
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"[{label}] generating {rows:,} sessions -> {path}")
+        load_sec = round(build_database(path, rows, args.seed, now), 2)
+
+    bonefire_flask.db_pool = SQLitePool(path, size=1)
+    client = bonefire_flask.app.test_client()
+    ember_id = top_user(path)
+    pages = {
+        "flames_ember_list": "/flames",
+        "flames_summary": "/flames/summary",
+        "flames_heatmap": "/flames/heatmap",
+        "flames_focus_view": "/flames/focus",
+        "flames_pareto_view": "/flames/pareto",
+        "flames_range_7d": f"/flames/{ember_id}/7",
+        "flames_range_all": f"/flames/{ember_id}/0",
+    }
+
+    endpoints = {}
+    for name, page in pages.items():
+        endpoints[name] = bench_endpoint(client, page, args.repeat)
+        print(f"[{label}] {name:20} cold {endpoints[name]['cold']['median_ms']:10.2f} ms"
+              f"   warm {endpoints[name]['warm']['median_ms']:8.2f} ms"
+              f"   peak {endpoints[name]['peak_alloc_kb']:10.1f} KiB")
+
+    return {
+        "rows": rows,
+        "users": user_count(rows),
+        "load_sec": load_sec,
+        "db_mb": round(os.path.getsize(path) / 2**20, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(SCALES))
+    parser.add_argument("--seed", type=int, default=1004)
+    parser.add_argument("--repeat", type=int, default=5, help="timed requests per page and mode")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "benchmarks", "data"))
+    parser.add_argument("--rebuild", action="store_true", help="regenerate databases that already exist")
+    parser.add_argument("--json", default="flames_benchmark.json", help="results file")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    now = datetime.now().replace(microsecond=0)
+    bonefire_flask.create_app({"jwt_secret": "benchmark"})
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "started_at": now.isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "scales": {},
+    }
+    for label in args.scales:
+        results["scales"][label] = run_scale(label, SCALES[label], args, now)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
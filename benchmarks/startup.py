@@ -0,0 +1,101 @@
+"""Measure cold import and startup time of the bonefire modules.
+
+Every sample runs in a fresh interpreter, so nothing is cached between runs::
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --config config.json --json startup.json
+
+``--config`` also times ``create_app``/``configure`` (which do not connect
+to the database; connections open on first use).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = [
+    "bonefire_config",
+    "bonefire_db",
+    "bonefire_cache",
+    "bonefire_client",
+    "bonefire_analytics",
+    "bonefire_rollup",
+    "bonefire_flask",
+    "bonefire_logger",
+]
+# module -> startup call timed after the import when --config is given
+STARTUP = {
+    "bonefire_flask": "create_app",
+    "bonefire_logger": "configure",
+}
+
+SAMPLE = """
+import time
+t0 = time.perf_counter()
+import {module} as m
+t1 = time.perf_counter()
+if {startup!r}:
+    getattr(m, {startup!r})()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+
+def sample(module, startup, config):
+    env = dict(os.environ)
+    if config:
+        env["BONEFIRE_CONFIG"] = os.path.abspath(config)
+    code = SAMPLE.format(module=module, startup=startup if config else None)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed")
+    import_sec, startup_sec = map(float, out.stdout.split())
+    return import_sec, startup_sec
+
+
+def summarize(values):
+    return {
+        "min_ms": round(min(values) * 1000, 2),
+        "median_ms": round(statistics.median(values) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--config", help="config.json to time create_app/configure against")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        startup = STARTUP.get(module)
+        try:
+            samples = [sample(module, startup, args.config) for _ in range(args.runs)]
+        except RuntimeError as e:
+            results[module] = {"error": str(e)}
+            print(f"{module:20} error: {e}")
+            continue
+        entry = {"import": summarize([s[0] for s in samples])}
+        line = f"{module:20} import {entry['import']['median_ms']:8.2f} ms"
+        if startup and args.config:
+            entry[startup] = summarize([s[1] for s in samples])
+            line += f"   {startup} {entry[startup]['median_ms']:8.2f} ms"
+        results[module] = entry
+        print(line)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "runs": args.runs, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
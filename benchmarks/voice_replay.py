@@ -0,0 +1,355 @@
+"""Replay voice-state traces through TrackingBot without a Discord connection.
+
+Join/leave/move events are fed to ``TrackingBot.on_voice_state_update``
+with plain stand-in member, channel and voice-state objects, at a fixed
+rate or as fast as possible. Finished sessions go through the real
+``SessionWriter`` into a recording stand-in for the database. The written
+``voice_sessions`` rows are then checked against a reference model of the
+trace::
+
+    python benchmarks/voice_replay.py --events 20000 --rate 500
+    python benchmarks/voice_replay.py --trace trace.jsonl --rate 0 --db-latency-ms 20
+
+The bot's clock follows the trace timestamps, so session lengths come from
+the trace and not from how fast it is replayed. ``--record`` saves the
+synthetic trace as JSON lines (``{"t", "user", "before", "after"}``) for
+later replays.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bonefire_logger  # noqa: E402
+
+
+MIN_SESSION_SEC = 5  # save_session drops anything shorter
+TRACKED_CHANNELS = [9001, 9002, 9003, 9004]
+UNTRACKED_CHANNELS = [9101, 9102]
+
+
+# ---------- Traces ----------
+def synthetic_trace(events, users, seed):
+    """Generate ``events`` voice-state changes for ``users`` members.
+
+    Each member alternates between idle periods and visits of exponential
+    length (mean 40 minutes); one visit in five moves to another channel
+    instead of leaving. A quarter of the channels are untracked and one
+    member in ten is untracked, so the bot's filters are exercised too.
+    """
+    rng = np.random.default_rng(seed)
+    channels = TRACKED_CHANNELS + UNTRACKED_CHANNELS
+    clock = rng.exponential(600, size=users)
+    where = [None] * users
+    trace = []
+    while len(trace) < events:
+        user = int(np.argmin(clock))
+        t = float(clock[user])
+        before = where[user]
+        if before is None:
+            after = int(rng.choice(channels))
+            clock[user] += rng.exponential(40 * 60)
+        elif rng.random() < 0.2:
+            after = int(rng.choice([c for c in channels if c != before]))
+            clock[user] += rng.exponential(20 * 60)
+        else:
+            after = None
+            clock[user] += rng.exponential(3 * 3600)
+        where[user] = after
+        trace.append({"t": round(t, 3), "user": 100000 + user, "before": before, "after": after})
+    return trace
+
+
+def load_trace(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_trace(path, trace):
+    with open(path, "w", encoding="utf-8") as f:
+        for event in trace:
+            f.write(json.dumps(event) + "\n")
+
+
+def expected_sessions(trace, start, tracked_users, tracked_channels):
+    """Sessions the bot should write for ``trace``, keyed by ``(user_id, start_time)``."""
+    open_sessions = {}
+    expected = {}
+    for event in trace:
+        user, before, after = event["user"], event["before"], event["after"]
+        if user not in tracked_users:
+            continue
+        now = start + timedelta(seconds=event["t"])
+        before_tracked = before in tracked_channels
+        after_tracked = after in tracked_channels
+        if before_tracked and not after_tracked and user in open_sessions:
+            channel_id, started = open_sessions.pop(user)
+            duration = int((now - started).total_seconds())
+            if duration >= MIN_SESSION_SEC:
+                # stored times keep whole seconds
+                expected[(user, started.replace(microsecond=0))] = (channel_id, now.replace(microsecond=0), duration)
+        if after_tracked and not before_tracked:
+            open_sessions[user] = (after, now)
+    return expected
+
+
+# ---------- Stand-ins ----------
+class TraceClock(datetime):
+    """``datetime`` whose ``now()`` is the timestamp of the event being replayed."""
+
+    current = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current if tz is None else cls.current.astimezone(tz)
+
+
+class RecordingConnection:
+    """Accepts the session writer's statements and keeps the voice_sessions rows."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        self._store.count("commits")
+
+    def rollback(self):
+        self._store.count("rollbacks")
+
+    def cursor(self, cursor_class=None):
+        return RecordingCursor(self._store)
+
+
+class RecordingCursor:
+    def __init__(self, store):
+        self._store = store
+        self._result = []
+
+    def execute(self, query, args=()):
+        if query.lstrip().upper().startswith("SELECT"):
+            self._result = self._store.read(args)
+        else:
+            self.executemany(query, [args])
+
+    def fetchall(self):
+        return self._result
+
+    def executemany(self, query, rows):
+        self._store.write(query, rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class RecordingPool:
+    """Replaces the bot's ``ConnectionPool``; every statement sleeps ``latency`` seconds."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.sessions = {}
+        self.written_at = {}
+        self.calls = {"statements": 0, "rows": 0, "commits": 0, "rollbacks": 0}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def connection(self):
+        yield RecordingConnection(self)
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def read(self, keys):
+        """Stored ``(user_id, username, channel_id, start, end)`` rows for flattened ``(user_id, start)`` pairs."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls["statements"] += 1
+            found = []
+            for user_id, start in zip(keys[::2], keys[1::2]):
+                stored = self.sessions.get((user_id, start))
+                if stored is not None:
+                    found.append((user_id, stored[3], stored[0], start, stored[1]))
+            return found
+
+    def write(self, query, rows):
+        if self.latency:
+            time.sleep(self.latency)
+        now = time.perf_counter()
+        with self._lock:
+            self.calls["statements"] += 1
+            self.calls["rows"] += len(rows)
+            if "INSERT INTO voice_sessions" in query:
+                for user_id, username, channel_id, _, start, end, duration in rows:
+                    key = (user_id, start)
+                    self.sessions[key] = (channel_id, end, duration, username)
+                    self.written_at.setdefault(key, now)
+
+    def stats(self):
+        return dict(self.calls)
+
+
+# ---------- Replay ----------
+def percentiles(samples, scale=1000):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * scale  # noqa: E731
+    return {
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "max_ms": round(ordered[-1] * scale, 3),
+        "mean_ms": round(statistics.fmean(ordered) * scale, 3),
+    }
+
+
+async def replay(bot, trace, start, rate):
+    members = {}
+    channels = {c: SimpleNamespace(id=c, name=f"pyre{c}") for c in TRACKED_CHANNELS + UNTRACKED_CHANNELS}
+    latencies = []
+    lags = []
+    left_at = {}
+
+    began = time.perf_counter()
+    for i, event in enumerate(trace):
+        if rate:
+            lag = time.perf_counter() - (began + i / rate)
+            if lag < 0:
+                await asyncio.sleep(-lag)
+                lag = 0.0
+            lags.append(lag)
+
+        user = event["user"]
+        member = members.setdefault(user, SimpleNamespace(id=user, name=f"ember{user}"))
+        before = SimpleNamespace(channel=channels.get(event["before"]))
+        after = SimpleNamespace(channel=channels.get(event["after"]))
+        TraceClock.current = (start + timedelta(seconds=event["t"])).replace(tzinfo=bonefire_logger.KST)
+
+        session = bot.user_sessions.get(user)
+        t0 = time.perf_counter()
+        await bot.on_voice_state_update(member, before, after)
+        t1 = time.perf_counter()
+        latencies.append(t1 - t0)
+        if session is not None and bot.user_sessions.get(user) is not session:
+            left_at[(user, session["start"].replace(tzinfo=None, microsecond=0))] = t1
+    return time.perf_counter() - began, latencies, lags, left_at
+
+
+def check(pool, expected):
+    missing = [k for k in expected if k not in pool.sessions]
+    unexpected = [k for k in pool.sessions if k not in expected]
+    wrong = [k for k, row in expected.items() if k in pool.sessions and pool.sessions[k][:3] != row]
+    return {
+        "expected": len(expected),
+        "written": len(pool.sessions),
+        "missing": len(missing),
+        "unexpected": len(unexpected),
+        "mismatched": len(wrong),
+        "examples": [str(k) for k in (missing + unexpected + wrong)[:5]],
+    }
+
+
+async def run(args, trace):
+    journal_dir = tempfile.mkdtemp(prefix="bonefire-replay-")
+    bonefire_logger.configure(
+        {
+            "guild_id": 1,
+            "database": {},
+            "session_flush_size": args.flush_size,
+            "session_flush_interval_sec": args.flush_interval,
+            "session_journal_path": os.path.join(journal_dir, "open_sessions.journal"),
+        }
+    )
+    pool = RecordingPool(args.db_latency_ms / 1000)
+    bonefire_logger.db_pool = pool
+    bonefire_logger.datetime = TraceClock
+
+    users = sorted({e["user"] for e in trace})
+    tracked_users = {u for u in users if u % 10}
+    tracked_channels = set(TRACKED_CHANNELS)
+    for user in tracked_users:
+        bonefire_logger.tracked_registry.add_user(user)
+    for channel in tracked_channels:
+        bonefire_logger.tracked_registry.add_channel(channel)
+
+    bot = bonefire_logger.TrackingBot()
+    bonefire_logger.session_writer.start()
+    start = datetime(2026, 1, 1)
+
+    elapsed, latencies, lags, left_at = await replay(bot, trace, start, args.rate)
+    writer_backlog = bonefire_logger.session_writer.stats()["queue_depth"]
+    drain_started = time.perf_counter()
+    await asyncio.to_thread(bonefire_logger.session_writer.stop)
+    drain = time.perf_counter() - drain_started
+    bonefire_logger.session_journal.shutdown()
+
+    delays = [pool.written_at[k] - t for k, t in left_at.items() if k in pool.written_at]
+    calls = pool.stats()
+    return {
+        "events": len(trace),
+        "users": len(users),
+        "rate_target": args.rate or None,
+        "events_per_sec": round(len(trace) / elapsed, 1),
+        "handler_latency": percentiles(latencies),
+        "schedule_lag": percentiles(lags),
+        "write_delay": percentiles(delays),
+        "writer_backlog_at_end": writer_backlog,
+        "drain_sec": round(drain, 3),
+        "db_calls": calls,
+        "db_statements_per_event": round(calls["statements"] / len(trace), 4),
+        "db_transactions_per_event": round(calls["commits"] / len(trace), 4),
+        "writer": bonefire_logger.session_writer.stats(),
+        "check": check(pool, expected_sessions(trace, start, tracked_users, tracked_channels)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", help="JSON-lines trace to replay instead of a synthetic one")
+    parser.add_argument("--record", help="write the synthetic trace here")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1004)
+    parser.add_argument("--rate", type=float, default=0, help="events per second; 0 replays as fast as possible")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="simulated time per database statement")
+    parser.add_argument("--flush-size", type=int, default=bonefire_logger.SESSION_FLUSH_SIZE)
+    parser.add_argument("--flush-interval", type=float, default=bonefire_logger.SESSION_FLUSH_INTERVAL_SEC)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace) if args.trace else synthetic_trace(args.events, args.users, args.seed)
+    if args.record:
+        save_trace(args.record, trace)
+
+    results = asyncio.run(run(args, trace))
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if results["check"]["missing"] or results["check"]["unexpected"] or results["check"]["mismatched"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
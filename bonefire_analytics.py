@@ -0,0 +1,159 @@
+"""Session analytics shared by the /flames dashboards and the hourly rollup.
+
+:class:`SessionFrame` holds session start/end times as NumPy arrays and
+splits every session across the clock hours it actually covers, so a
+two-hour session counts toward both hours instead of only its start hour.
+Weekday and hour histograms are computed from those pieces with array
+operations.
+
+Several pages also compare the same statistics over nested time windows
+(last day, last week, ..., all time). Instead of querying once per window,
+callers read the rows once, newest first, and :func:`aggregate_windows`
+assigns every row to the narrowest window containing it. Wider windows are
+then built by folding the narrower ones in.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+EPOCH_DATE = date(1970, 1, 1)
+# 1970-01-01 was a Thursday; datetime.weekday() numbers Monday as 0
+EPOCH_WEEKDAY = 3
+
+
+def to_epoch_seconds(values: Sequence[datetime]) -> np.ndarray:
+    """Wall-clock datetimes as int64 seconds since 1970-01-01 (time zones are dropped)."""
+    return np.array([v.replace(tzinfo=None) for v in values], dtype="datetime64[s]").astype(np.int64)
+
+
+def split_hours(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split ``[start, end)`` intervals at clock-hour boundaries.
+
+    Returns ``(session_idx, hour_idx, seconds)`` with one entry per piece,
+    where ``hour_idx`` counts hours since the epoch. Empty or negative
+    intervals produce no pieces.
+    """
+    first = starts // 3600
+    last = (ends - 1) // 3600
+    counts = np.where(ends > starts, last - first + 1, 0)
+    session_idx = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    hour_idx = first[session_idx] + offsets
+    piece_start = np.maximum(starts[session_idx], hour_idx * 3600)
+    piece_end = np.minimum(ends[session_idx], (hour_idx + 1) * 3600)
+    return session_idx, hour_idx, piece_end - piece_start
+
+
+def epoch_day_to_date(day: int) -> date:
+    return EPOCH_DATE + timedelta(days=int(day))
+
+
+class SessionFrame:
+    """Columnar view of voice sessions with their hour-split pieces."""
+
+    def __init__(self, user_ids: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        self.user_ids = user_ids
+        self.starts = starts
+        self.ends = ends
+        self.session_idx, self.hour_idx, self.seconds = split_hours(starts, ends)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "SessionFrame":
+        """Build a frame from ``(user_id, start, end)`` tuples."""
+        rows = list(rows)
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(empty, empty, empty)
+        user_ids, starts, ends = zip(*rows)
+        return cls(np.array(user_ids, dtype=np.int64), to_epoch_seconds(starts), to_epoch_seconds(ends))
+
+    def hour_totals(self) -> np.ndarray:
+        """Seconds per hour of day (length 24)."""
+        return np.bincount(self.hour_idx % 24, weights=self.seconds, minlength=24).astype(np.int64)
+
+    def weekday_totals(self) -> np.ndarray:
+        """Seconds per weekday, Monday first (length 7)."""
+        weekdays = (self.hour_idx // 24 + EPOCH_WEEKDAY) % 7
+        return np.bincount(weekdays, weights=self.seconds, minlength=7).astype(np.int64)
+
+    def entry_days(self) -> int:
+        """Number of distinct days on which at least one session started."""
+        return len(np.unique(self.starts // 86400))
+
+
+# (label, days); days=None means all recorded history
+DEFAULT_WINDOWS = [("1일", 1), ("7일", 7), ("30일", 30), ("전체", None)]
+
+
+def window_cutoffs(windows: Sequence, now: datetime) -> List[Tuple[str, Optional[datetime]]]:
+    """Turn ``(label, days)`` pairs into ``(label, start)`` pairs relative to ``now``."""
+    return [(label, None if days is None else now - timedelta(days=days)) for label, days in windows]
+
+
+def _empty_stats() -> Dict:
+    return {"hours": defaultdict(int), "users": defaultdict(int), "total": 0}
+
+
+def _merge(into: Dict, stats: Dict) -> None:
+    for hour, seconds in stats["hours"].items():
+        into["hours"][hour] += seconds
+    for user_id, seconds in stats["users"].items():
+        into["users"][user_id] += seconds
+    into["total"] += stats["total"]
+
+
+def aggregate_windows(rows: Iterable[tuple], cutoffs: Sequence) -> List[Tuple[str, Dict]]:
+    """Aggregate ``(user_id, bucket_date, bucket_hour, seconds)`` rows for every window.
+
+    ``rows`` must be ordered newest bucket first and ``cutoffs`` is a list of
+    ``(label, start)`` as returned by :func:`window_cutoffs`. Returns
+    ``(label, stats)`` in the order of ``cutoffs`` where ``stats`` holds
+    per-hour seconds (``hours``), per-user seconds (``users``) and ``total``.
+    """
+    # narrowest window first; the all-time window (start=None) goes last
+    order = sorted(range(len(cutoffs)), key=lambda i: cutoffs[i][1] or datetime.min, reverse=True)
+    bounds = [None if cutoffs[i][1] is None else (cutoffs[i][1].date(), cutoffs[i][1].hour) for i in order]
+    rings = [_empty_stats() for _ in order]
+
+    ring = 0
+    for user_id, bucket_date, bucket_hour, seconds in rows:
+        bucket = (bucket_date, bucket_hour)
+        while ring < len(bounds) and bounds[ring] is not None and bucket < bounds[ring]:
+            ring += 1
+        if ring == len(bounds):
+            break
+        stats = rings[ring]
+        stats["hours"][bucket_hour] += seconds
+        stats["users"][user_id] += seconds
+        stats["total"] += seconds
+
+    results = [None] * len(cutoffs)
+    running = _empty_stats()
+    for idx, stats in zip(order, rings):
+        _merge(running, stats)
+        snapshot = _empty_stats()
+        _merge(snapshot, running)
+        results[idx] = (cutoffs[idx][0], snapshot)
+    return results
+
+
+def hour_shares(stats: Dict) -> Dict[int, Dict]:
+    """Share of the window's total time spent in each hour, in percent."""
+    total = stats["total"]
+    return {
+        hour: {"percent": round(seconds / total * 100, 2)}
+        for hour, seconds in sorted(stats["hours"].items())
+        if seconds > 0
+    }
+
+
+def top_share(stats: Dict, top_n: int) -> float:
+    """Percentage of the window's total time contributed by the ``top_n`` busiest users."""
+    if not stats["total"]:
+        return 0
+    top = sorted(stats["users"].values(), reverse=True)[:top_n]
+    return round(sum(top) / stats["total"] * 100, 2)
@@ -0,0 +1,75 @@
+"""Versioned response cache for the dashboard's /flames pages.
+
+The bot bumps the ``sessions`` row of ``data_versions`` in the same
+transaction that writes finished sessions, so a cached page is reused only
+while that version is unchanged (and its TTL has not run out).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+SESSIONS_VERSION = "sessions"
+
+DATA_VERSION_SQL = "SELECT version FROM data_versions WHERE name = %s"
+BUMP_DATA_VERSION_SQL = """
+    INSERT INTO data_versions (name, version) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+
+def etag_for(body: str) -> str:
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU cache of rendered responses tagged with the data version they saw.
+
+    ``get`` misses when the entry is older than ``ttl`` seconds or was
+    rendered under a different version; pages that depend on the clock
+    (the heatmap's dates, the focus windows) are refreshed by the TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def get(self, key: str, version) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now and entry[1] == version:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+                self._stats["stale"] += 1
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, version, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0
+        return stats
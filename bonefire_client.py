@@ -0,0 +1,152 @@
+"""HTTP client the dashboard uses to talk to the bot's FastAPI server."""
+
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bonefire_metrics import REGISTRY
+
+
+# (connect, read) timeouts in seconds, keyed by the first path segment
+DEFAULT_TIMEOUTS = {
+    "/verify_user": (1.0, 5.0),
+    "/verify_channel": (1.0, 5.0),
+    "/verify_users": (1.0, 15.0),
+    "/verify_channels": (1.0, 15.0),
+    "/member_info": (1.0, 3.0),
+    "/untrack_user": (1.0, 2.0),
+    "/untrack_channel": (1.0, 2.0),
+}
+FALLBACK_TIMEOUT = (1.0, 5.0)
+RETRY_STATUSES = {502, 503, 504}
+
+BOT_API_SECONDS = REGISTRY.histogram(
+    "bonefire_bot_api_seconds", "Bot API calls made by the dashboard, including retries.", ("endpoint", "outcome")
+)
+BOT_API_REJECTED = REGISTRY.counter(
+    "bonefire_bot_api_rejected_total", "Bot API calls skipped while the circuit breaker was open.", ("endpoint",)
+)
+
+
+class BotClient:
+    """Keep-alive client for the bot API.
+
+    One ``requests.Session`` keeps connections to the bot open between
+    dashboard requests. Failed connects and gateway statuses are retried
+    up to ``retries`` times with jittered exponential backoff. A read
+    timeout means the bot is up but hung, so it is not retried and counts
+    as a single failure. After
+    ``failure_threshold`` consecutive failures the client stops calling the
+    bot for ``cooldown`` seconds and fails immediately instead.
+
+    Failures never raise: callers get ``{"success": False, "reason": ...}``
+    just like a negative answer from the bot.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 10,
+        retries: int = 2,
+        backoff: float = 0.1,
+        failure_threshold: int = 3,
+        cooldown: float = 10.0,
+        timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self._base_url = base_url.rstrip("/")
+        self._retries = retries
+        self._backoff = backoff
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._endpoints = {}
+
+    @staticmethod
+    def _endpoint(path: str) -> str:
+        return "/" + path.lstrip("/").split("/", 1)[0]
+
+    def _record(self, endpoint: str, elapsed_ms: float, ok: bool) -> None:
+        BOT_API_SECONDS.observe(elapsed_ms / 1000, endpoint=endpoint, outcome="ok" if ok else "error")
+        with self._lock:
+            stats = self._endpoints.setdefault(
+                endpoint, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if ok:
+                self._consecutive_failures = 0
+            else:
+                stats["errors"] += 1
+                self._consecutive_failures += 1
+                if self._consecutive_failures >= self._failure_threshold:
+                    self._open_until = time.monotonic() + self._cooldown
+
+    def request(self, method: str, path: str, payload: Optional[dict] = None) -> dict:
+        endpoint = self._endpoint(path)
+        with self._lock:
+            rejected = time.monotonic() < self._open_until
+        if rejected:
+            BOT_API_REJECTED.inc(endpoint=endpoint)
+            return {"success": False, "reason": "bot_unavailable"}
+
+        timeout = self._timeouts.get(endpoint, FALLBACK_TIMEOUT)
+        started = time.perf_counter()
+        for attempt in range(self._retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, self._backoff * 2 ** attempt))
+            try:
+                res = self._session.request(method, f"{self._base_url}{path}", json=payload, timeout=timeout)
+            except requests.ConnectionError:  # includes ConnectTimeout
+                continue
+            except requests.RequestException as e:
+                self._record(endpoint, (time.perf_counter() - started) * 1000, False)
+                reason = "bot_timeout" if isinstance(e, requests.Timeout) else "bot_unreachable"
+                return {"success": False, "reason": reason}
+            if res.status_code in RETRY_STATUSES:
+                continue
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            try:
+                data = res.json()
+            except ValueError:
+                self._record(endpoint, elapsed_ms, False)
+                return {"success": False, "reason": f"bad_response_{res.status_code}"}
+            self._record(endpoint, elapsed_ms, True)
+            return data
+
+        self._record(endpoint, (time.perf_counter() - started) * 1000, False)
+        return {"success": False, "reason": "bot_unreachable"}
+
+    def get(self, path: str) -> dict:
+        return self.request("GET", path)
+
+    def post(self, path: str, payload: dict) -> dict:
+        return self.request("POST", path, payload)
+
+    def stats(self) -> dict:
+        with self._lock:
+            endpoints = {
+                endpoint: dict(
+                    stats,
+                    total_ms=round(stats["total_ms"], 2),
+                    max_ms=round(stats["max_ms"], 2),
+                    avg_ms=round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else 0,
+                )
+                for endpoint, stats in self._endpoints.items()
+            }
+            return {
+                "circuit_open": time.monotonic() < self._open_until,
+                "consecutive_failures": self._consecutive_failures,
+                "endpoints": endpoints,
+            }
@@ -0,0 +1,22 @@
+"""Loads ``config.json`` for the bot, the dashboard and the maintenance scripts.
+
+Nothing is read at import; each process calls ``load_config`` at startup.
+``BONEFIRE_CONFIG`` points at a different file.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Optional
+
+
+CONFIG_PATH = os.environ.get(
+    "BONEFIRE_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+)
+
+
+@lru_cache(maxsize=None)
+def load_config(path: Optional[str] = None) -> dict:
+    """Read and cache the config file; callers must not mutate the result."""
+    with open(path or CONFIG_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,358 @@
+"""Thread-safe PyMySQL connection pool shared by the bot and the dashboard.
+
+:func:`create_pool` picks the storage backend; ``bonefire_sqlite`` provides
+the embedded SQLite one.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pymysql
+
+from bonefire_metrics import REGISTRY
+from bonefire_profiler import QUERY_PROFILER
+
+
+POOL_CHECKOUT_SECONDS = REGISTRY.histogram(
+    "bonefire_db_pool_checkout_seconds", "Time to check a connection out of the pool, including waits."
+)
+
+
+class _ProfiledMixin:
+    """Reports every statement to ``QUERY_PROFILER``; ``executemany`` counts as one call."""
+
+    _in_batch = False
+
+    def execute(self, query, args=None):
+        if self._in_batch or not QUERY_PROFILER.enabled:
+            return super().execute(query, args)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            QUERY_PROFILER.record(query, args, (time.perf_counter() - started) * 1000, max(self.rowcount, 0))
+
+    def executemany(self, query, args):
+        if not args or not QUERY_PROFILER.enabled:
+            return super().executemany(query, args)
+        started = time.perf_counter()
+        self._in_batch = True
+        try:
+            return super().executemany(query, args)
+        finally:
+            self._in_batch = False
+            QUERY_PROFILER.record(query, args[0], (time.perf_counter() - started) * 1000, len(args))
+
+
+class ProfiledCursor(_ProfiledMixin, pymysql.cursors.Cursor):
+    """Default cursor of pooled connections."""
+
+
+class ProfiledSSCursor(_ProfiledMixin, pymysql.cursors.SSCursor):
+    """Unbuffered cursor for large results; the timing covers running the query, not streaming its rows."""
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the checkout timeout."""
+
+
+class ConnectionPool:
+    """Bounded pool of PyMySQL connections.
+
+    Nothing is opened up front: connections are created on demand (or by an
+    explicit :meth:`warmup`) up to ``size``. Under bursts up to ``overflow``
+    extra connections may be opened; they are closed again when returned
+    while the pool is above ``size``. Once ``size + overflow`` connections
+    are checked out, callers wait up to ``timeout`` seconds.
+
+    A connection is only pinged on checkout if it sat idle for at least
+    ``ping_after`` seconds, and is replaced once it is older than
+    ``max_lifetime`` seconds.
+
+    Connections use :class:`ProfiledCursor` unless ``cursorclass`` is given.
+    """
+
+    def __init__(self, size=5, overflow=0, max_lifetime=3600, timeout=10, ping_after=30, **db_config):
+        self._size = size
+        self._overflow = overflow
+        self._max_lifetime = max_lifetime
+        self._timeout = timeout
+        self._ping_after = ping_after
+        self._db_config = dict(db_config)
+        self._db_config.setdefault("cursorclass", ProfiledCursor)
+        self._idle = deque()
+        self._open = 0
+        self._created_at = {}
+        self._cond = threading.Condition()
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "discarded": 0,
+            "pings": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "wait_ms_total": 0.0,
+        }
+
+    def _open_connection(self):
+        return pymysql.connect(**self._db_config)
+
+    def _connect(self):
+        """Open a connection for a slot that the caller already reserved."""
+        try:
+            conn = self._open_connection()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats["created"] += 1
+        return conn
+
+    def _close(self, conn, keep_slot=False):
+        with self._cond:
+            if not keep_slot:
+                self._open -= 1
+                self._cond.notify()
+            self._created_at.pop(id(conn), None)
+            self._stats["discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn, idle_since):
+        now = time.monotonic()
+        if now - self._created_at.get(id(conn), 0) > self._max_lifetime:
+            return False
+        if now - idle_since < self._ping_after:
+            return True
+        with self._cond:
+            self._stats["pings"] += 1
+        try:
+            conn.ping(reconnect=False)
+        except Exception:
+            return False
+        return True
+
+    def warmup(self, count=None):
+        """Open up to ``count`` (default ``size``) idle connections ahead of demand.
+
+        Connection errors are swallowed; the pool keeps working lazily.
+        Returns the number of connections opened.
+        """
+        target = self._size if count is None else min(count, self._size)
+        opened = 0
+        while True:
+            with self._cond:
+                if self._open >= target:
+                    return opened
+                self._open += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                return opened
+            self.release(conn)
+            opened += 1
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self._timeout
+        with self._cond:
+            if not self._idle and self._open >= self._size + self._overflow:
+                self._stats["waits"] += 1
+                while not self._idle and self._open >= self._size + self._overflow:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"no database connection free after {self._timeout}s")
+                    self._cond.wait(remaining)
+                self._stats["wait_ms_total"] += (time.monotonic() - started) * 1000
+            if self._idle:
+                conn, idle_since = self._idle.pop()
+            else:
+                conn = None
+                self._open += 1
+
+        if conn is None:
+            conn = self._connect()
+        elif self._healthy(conn, idle_since):
+            with self._cond:
+                self._stats["reused"] += 1
+        else:
+            self._close(conn, keep_slot=True)
+            conn = self._connect()
+        POOL_CHECKOUT_SECONDS.observe(time.monotonic() - started)
+        return conn
+
+    def release(self, conn, discard=False):
+        with self._cond:
+            overflowing = self._open > self._size
+        if discard or overflowing or not conn.open:
+            self._close(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a ``with`` block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        except pymysql.err.OperationalError:
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["overflow"] = self._overflow
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+        stats["in_use"] = stats["open"] - stats["idle"]
+        stats["wait_ms_total"] = round(stats["wait_ms_total"], 2)
+        return stats
+
+
+def create_pool(cfg, size, **db_config):
+    """The pool for ``cfg["storage"]``: MySQL (the default) or embedded SQLite.
+
+    ``size`` is the default ``db_pool_size``; ``db_config`` holds PyMySQL
+    connect arguments and is ignored by the SQLite backend.
+    """
+    options = dict(
+        size=cfg.get("db_pool_size", size),
+        overflow=cfg.get("db_pool_overflow", 5),
+        max_lifetime=cfg.get("db_pool_max_lifetime_sec", 3600),
+        timeout=cfg.get("db_pool_timeout_sec", 10),
+        ping_after=cfg.get("db_pool_ping_after_sec", 30),
+    )
+    storage = cfg.get("storage", "mysql")
+    if storage == "sqlite":
+        # imported here because bonefire_sqlite builds on ConnectionPool
+        from bonefire_sqlite import SQLITE_PATH, SQLitePool
+
+        return SQLitePool(cfg.get("sqlite_path", SQLITE_PATH), cfg.get("sqlite_pragmas"), **options)
+    if storage != "mysql":
+        raise ValueError(f"unknown storage backend: {storage!r}")
+    return ConnectionPool(**options, **db_config)
+
+
+class DBExecutor:
+    """Runs blocking database calls on a dedicated thread pool for coroutines.
+
+    At most ``max_in_flight`` calls per event loop are handed to the
+    ``workers`` threads at once; further callers wait their turn without
+    blocking the loop. ``timeout`` bounds how long a caller waits for a
+    result. A timed-out call keeps running on its worker thread, since
+    PyMySQL queries cannot be interrupted, but the caller is released; the
+    call holds its in-flight slot until the work itself has finished.
+    """
+
+    def __init__(self, workers=10, max_in_flight=100, timeout=10):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self._workers = workers
+        self._max_in_flight = max_in_flight
+        self._timeout = timeout
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "waiting": 0,
+            "in_flight": 0,
+            "running": 0,
+            "peak_in_flight": 0,
+        }
+
+    def _slot(self, loop):
+        with self._lock:
+            slot = self._slots.get(loop)
+            if slot is None:
+                slot = self._slots[loop] = asyncio.Semaphore(self._max_in_flight)
+            return slot
+
+    def _count(self, key, delta):
+        with self._lock:
+            self._stats[key] += delta
+            if key == "in_flight" and self._stats[key] > self._stats["peak_in_flight"]:
+                self._stats["peak_in_flight"] = self._stats[key]
+
+    def _call(self, fn, args, kwargs):
+        self._count("running", 1)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._count("running", -1)
+
+    def _done(self, loop, slot):
+        # runs on the worker thread, or wherever a queued job got cancelled
+        self._count("in_flight", -1)
+        try:
+            loop.call_soon_threadsafe(slot.release)
+        except RuntimeError:
+            pass  # the loop is closed; nobody waits on its slots any more
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on the DB thread pool and await its result.
+
+        Raises ``asyncio.TimeoutError`` if it does not finish within
+        ``timeout`` (default: the executor's timeout) seconds.
+        """
+        loop = asyncio.get_running_loop()
+        slot = self._slot(loop)
+        self._count("waiting", 1)
+        try:
+            await slot.acquire()
+        finally:
+            self._count("waiting", -1)
+        try:
+            future = self._executor.submit(self._call, fn, args, kwargs)
+        except BaseException:
+            slot.release()
+            raise
+        self._count("submitted", 1)
+        self._count("in_flight", 1)
+        # the slot and the in-flight count are given back when the work is
+        # done, not when the caller stops waiting for it
+        future.add_done_callback(lambda _: self._done(loop, slot))
+        try:
+            # shield: a timeout must not cancel a job still queued for a worker
+            result = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), self._timeout if timeout is None else timeout
+            )
+        except asyncio.TimeoutError:
+            self._count("timeouts", 1)
+            raise
+        except Exception:
+            self._count("failed", 1)
+            raise
+        self._count("completed", 1)
+        return result
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["workers"] = self._workers
+        stats["max_in_flight"] = self._max_in_flight
+        stats["queue_depth"] = stats["in_flight"] - stats["running"]
+        return stats
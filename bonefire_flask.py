@@ -1,23 +1,52 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, g, jsonify, make_response
 import pymysql
-import json
-import requests
 import jwt
 from datetime import datetime, timedelta
 import calendar
-from collections import defaultdict
 import math
 import statistics
-import os
+import threading
+import time
+from functools import wraps
 from typing import List, Tuple
 
-CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = json.load(f)
+from bonefire_analytics import (
+    DEFAULT_WINDOWS,
+    SessionFrame,
+    aggregate_windows,
+    hour_shares,
+    top_share,
+    window_cutoffs,
+)
+from bonefire_cache import (
+    BUMP_DATA_VERSION_SQL,
+    DATA_VERSION_SQL,
+    SESSIONS_VERSION,
+    ResponseCache,
+    etag_for,
+)
+from bonefire_client import BotClient
+from bonefire_config import load_config
+from bonefire_db import ProfiledSSCursor, create_pool
+from bonefire_metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, REGISTRY
+from bonefire_profiler import QUERY_PROFILER
+from bonefire_queries import (
+    DELETE_TRACKED_USER_SQL,
+    DELETE_USER_ROLLUP_SQL,
+    DELETE_USER_SESSIONS_SQL,
+    EMBER_LIST_SQL,
+    ENABLED_CHANNELS_SQL,
+    FLAMES_HEATMAP_SQL,
+    FLAMES_RANGE_SQL,
+    FLAMES_SUMMARY_SQL,
+    TRACKED_USERS_SQL,
+    UNTRACK_CHANNEL_SQL,
+    flame_windows_query,
+    scars_page_query,
+)
 
-DB_CONFIG = config.get("database", {})
 BOT_API_URL = "http://localhost:8000"  # 봇 FastAPI 서버 주소
-JWT_SECRET = config.get("jwt_secret", "change_me")
+SCARS_PAGE_SIZE = 50
 
 app = Flask(__name__)
 app.secret_key = "13252134"  # flash 메시지용
@@ -25,17 +54,145 @@ app.secret_key = "13252134"  # flash 메시지용
 HASTATI_ROLE_NAME = "━━♔⊱༻ 하스타티 ༺⊰♔━━"
 LEGATUS_ROLE_NAME = "✧˖*°࿐.*.｡ ⚔️레가투스⚔️.*.✧˖*°࿐"
 
+# Set by create_app(); nothing touches config.json or the database at import.
+config = None
+JWT_SECRET = None
+# [label, days] pairs compared on /flames/focus and /flames/pareto; days=null is all time
+FLAME_WINDOWS = DEFAULT_WINDOWS
+db_pool = None
+bot_client = None
+flames_cache = None
+_init_lock = threading.Lock()
+
+
+def create_app(cfg=None):
+    """Load config and create the dashboard's pool, bot client and cache.
+
+    Runs on the first request unless called explicitly, e.g. by
+    ``gunicorn 'bonefire_flask:create_app()'``. Each worker process then
+    opens its own connections after forking. ``cfg`` replaces config.json.
+    """
+    global config, JWT_SECRET, FLAME_WINDOWS, db_pool, bot_client, flames_cache
+    with _init_lock:
+        if config is not None:
+            return app
+        cfg = load_config() if cfg is None else cfg
+        db_config = cfg.get("database", {})
+
+        JWT_SECRET = cfg.get("jwt_secret", "change_me")
+        FLAME_WINDOWS = cfg.get("flame_windows", DEFAULT_WINDOWS)
+        db_pool = create_pool(
+            cfg,
+            5,
+            host=db_config.get("host"),
+            user=db_config.get("user"),
+            password=db_config.get("password"),
+            database=db_config.get("database"),
+            port=db_config.get("port", 3306),
+            charset="utf8mb4",
+            autocommit=True,
+        )
+        bot_client = BotClient(
+            BOT_API_URL,
+            retries=cfg.get("bot_api_retries", 2),
+            failure_threshold=cfg.get("bot_api_failure_threshold", 3),
+            cooldown=cfg.get("bot_api_cooldown_sec", 10),
+        )
+        flames_cache = ResponseCache(
+            maxsize=cfg.get("flames_cache_size", 256),
+            ttl=cfg.get("flames_cache_ttl_sec", 60),
+        )
+        QUERY_PROFILER.configure(
+            slow_ms=cfg.get("slow_query_ms", 200),
+            enabled=cfg.get("query_profiler", True),
+            log_path=cfg.get("slow_query_log"),
+        )
+        REGISTRY.register_stats("bonefire_db_pool", db_pool.stats)
+        REGISTRY.register_stats("bonefire_queries", QUERY_PROFILER.stats)
+        REGISTRY.register_stats("bonefire_flames_cache", flames_cache.stats)
+        config = cfg
+    return app
+
+
+@app.before_request
+def ensure_app_created():
+    if config is None:
+        create_app()
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get("request_started")
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=request.url_rule.rule if request.url_rule else "unmatched",
+            status=response.status_code,
+        )
+    return response
+
+
+def get_db():
+    """Return the pooled connection for the current request, checking one out on first use."""
+    if "db" not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+
+@app.teardown_appcontext
+def release_db(exc):
+    db = g.pop("db", None)
+    if db is not None:
+        db_pool.release(db, discard=isinstance(exc, pymysql.err.OperationalError))
+
+
+def sessions_version():
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(DATA_VERSION_SQL, (SESSIONS_VERSION,))
+        row = cursor.fetchone()
+    return row[0] if row else 0
 
-def get_db_connection():
-    return pymysql.connect(
-        host=DB_CONFIG.get("host"),
-        user=DB_CONFIG.get("user"),
-        password=DB_CONFIG.get("password"),
-        database=DB_CONFIG.get("database"),
-        port=DB_CONFIG.get("port", 3306),
-        charset="utf8mb4",
-        autocommit=True,
-    )
+
+def bump_sessions_version(cursor) -> None:
+    """Invalidate cached /flames pages after the dashboard changes what they show."""
+    cursor.execute(BUMP_DATA_VERSION_SQL, (SESSIONS_VERSION,))
+
+
+def cached_page(view):
+    """Serve a /flames page from ``flames_cache`` while the sessions version is unchanged.
+
+    Responses carry an ETag, so a browser revalidating an unchanged page
+    gets ``304 Not Modified`` without the page being rendered again.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.full_path
+        version = sessions_version()
+        entry = flames_cache.get(key, version)
+        if entry is None:
+            body = view(*args, **kwargs)
+            entry = (body, etag_for(body))
+            flames_cache.put(key, version, entry)
+
+        body, etag = entry
+        response = make_response(body)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
+    return wrapper
+
+
+def notify_bot(path: str, payload: dict) -> None:
+    """Best-effort notification so the bot's tracked registry drops deleted entries.
+
+    Failures are ignored; the bot's periodic resync catches up anyway.
+    """
+    bot_client.post(path, payload)
 
 
 def check_access_and_report_visibility(member_roles: List[str]) -> Tuple[bool, bool]:
@@ -63,14 +220,10 @@ def check_access_and_report_visibility(member_roles: List[str]) -> Tuple[bool, b
 
 @app.route("/embers")
 def list_embers():
-    db = get_db_connection()
-    embers = []
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("SELECT user_id, username, nickname, role_name FROM tracked_users")
-            embers = cursor.fetchall()
-    finally:
-        db.close()
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(TRACKED_USERS_SQL)
+        embers = cursor.fetchall()
     return render_template("embers.html", embers=embers)
 
 
@@ -81,8 +234,7 @@ def add_ember():
         flash("잿불 이름을 입력해주세요.", "error")
         return redirect(url_for("list_embers"))
 
-    res = requests.post(f"{BOT_API_URL}/verify_user", json={"name": username})
-    data = res.json()
+    data = bot_client.post("/verify_user", {"name": username})
 
     if data.get("success"):
         flash(f"🔥 잿불 {username}이 피어올랐습니다 (ID: {data.get('user_id')})", "success")
@@ -94,26 +246,22 @@ def add_ember():
 
 @app.route("/embers/delete/<int:ember_id>")
 def delete_ember(ember_id):
-    db = get_db_connection()
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("DELETE FROM tracked_users WHERE user_id = %s", (ember_id,))
-            cursor.execute("DELETE FROM voice_sessions WHERE user_id = %s", (ember_id,))
-    finally:
-        db.close()
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(DELETE_TRACKED_USER_SQL, (ember_id,))
+        cursor.execute(DELETE_USER_SESSIONS_SQL, (ember_id,))
+        cursor.execute(DELETE_USER_ROLLUP_SQL, (ember_id,))
+        bump_sessions_version(cursor)
+    notify_bot("/untrack_user", {"user_id": ember_id})
     return redirect(url_for("list_embers"))
 
 
 @app.route("/pyres")
 def list_pyres():
-    db = get_db_connection()
-    pyres = []
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("SELECT channel_id, name FROM tracked_channels WHERE enabled = TRUE")
-            pyres = cursor.fetchall()
-    finally:
-        db.close()
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(ENABLED_CHANNELS_SQL)
+        pyres = cursor.fetchall()
     return render_template("pyres.html", pyres=pyres)
 
 
@@ -124,8 +272,7 @@ def add_pyre():
         flash("장작더미 이름을 입력해주세요.", "error")
         return redirect(url_for("list_pyres"))
 
-    res = requests.post(f"{BOT_API_URL}/verify_channel", json={"name": pyre_name})
-    data = res.json()
+    data = bot_client.post("/verify_channel", {"name": pyre_name})
 
     if data.get("success"):
         flash(f"🔥 장작더미 {pyre_name}이 추가되었습니다 (ID: {data.get('channel_id')})", "success")
@@ -137,24 +284,20 @@ def add_pyre():
 
 @app.route("/pyres/delete/<int:pyre_id>")
 def delete_pyre(pyre_id):
-    db = get_db_connection()
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("UPDATE tracked_channels SET enabled = FALSE WHERE channel_id = %s", (pyre_id,))
-    finally:
-        db.close()
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(UNTRACK_CHANNEL_SQL, (pyre_id,))
+    notify_bot("/untrack_channel", {"channel_id": pyre_id})
     return redirect(url_for("list_pyres"))
 
 
 @app.route("/flames")
+@cached_page
 def flames_ember_list():
-    db = get_db_connection()
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("SELECT DISTINCT user_id, username FROM voice_sessions ORDER BY username")
-            embers = cursor.fetchall()
-    finally:
-        db.close()
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(EMBER_LIST_SQL)
+        embers = cursor.fetchall()
     return render_template("flames_embers.html", embers=embers)
 
 
@@ -164,308 +307,231 @@ def flames(ember_id):
 
 
 @app.route("/flames/<int:ember_id>/<int:days>")
+@cached_page
 def flames_range(ember_id, days):
-    db = get_db_connection()
-    try:
-        with db.cursor() as cursor:
-            end_date = datetime.now()
-            if days == 0:
-                start_date = datetime(2000, 1, 1)  # 전체 기간
-            else:
-                start_date = end_date - timedelta(days=days)
-
-            cursor.execute(
-                """
-                SELECT username, start_time, end_time, duration_sec
-                FROM voice_sessions
-                WHERE user_id = %s AND start_time BETWEEN %s AND %s
-            """,
-                (ember_id, start_date, end_date),
-            )
-            sessions = cursor.fetchall()
+    db = get_db()
+    with db.cursor() as cursor:
+        end_date = datetime.now()
+        if days == 0:
+            start_date = datetime(2000, 1, 1)  # 전체 기간
+        else:
+            start_date = end_date - timedelta(days=days)
 
-        if not sessions:
-            return f"<h3>사용자 {ember_id}의 활동 기록이 없습니다.</h3>"
+        cursor.execute(FLAMES_RANGE_SQL, (ember_id, start_date, end_date))
+        sessions = cursor.fetchall()
 
-        username = sessions[0][0]
-        total_seconds = sum(row[3] for row in sessions)
-        total_minutes = total_seconds // 60
-        entry_count = len(sessions)
-        average_minutes = total_minutes // entry_count if entry_count else 0
-
-        weekday_totals = defaultdict(int)
-        hourly_totals = defaultdict(int)
-        active_days = set()
-
-        for row in sessions:
-            start = row[1]
-            duration = row[3]
-            weekday_totals[start.weekday()] += duration
-            hour = start.hour
-            hourly_totals[hour] += duration
-            active_days.add(start.date())
-
-        most_active_day = max(weekday_totals.items(), key=lambda x: x[1])
-        most_active_hour_range = max(hourly_totals.items(), key=lambda x: x[1])
-
-        def hour_range(hour):
-            return f"{hour:02d}:00 ~ {hour+1:02d}:00"
-
-        num_active_days = len(active_days) or 1
-        avg_entries_per_day = entry_count / num_active_days
-
-        return render_template(
-            "flames.html",
-            username=username,
-            user_id=ember_id,
-            total_minutes=total_minutes,
-            entry_count=entry_count,
-            avg_minutes=average_minutes,
-            top_day=calendar.day_name[most_active_day[0]],
-            top_day_minutes=most_active_day[1] // 60,
-            top_hour_range=hour_range(most_active_hour_range[0]),
-            hour_minutes=most_active_hour_range[1] // 60,
-            days=days,
-            avg_entries=avg_entries_per_day,
-        )
-    finally:
-        db.close()
+    if not sessions:
+        return f"<h3>사용자 {ember_id}의 활동 기록이 없습니다.</h3>"
+
+    username = sessions[0][0]
+    total_seconds = sum(row[3] for row in sessions)
+    total_minutes = total_seconds // 60
+    entry_count = len(sessions)
+    average_minutes = total_minutes // entry_count if entry_count else 0
+
+    frame = SessionFrame.from_rows((ember_id, row[1], row[2]) for row in sessions)
+    weekday_totals = frame.weekday_totals()
+    hourly_totals = frame.hour_totals()
+    top_weekday = int(weekday_totals.argmax())
+    top_hour = int(hourly_totals.argmax())
+    most_active_day = (top_weekday, int(weekday_totals[top_weekday]))
+    most_active_hour_range = (top_hour, int(hourly_totals[top_hour]))
+
+    def hour_range(hour):
+        return f"{hour:02d}:00 ~ {hour+1:02d}:00"
+
+    num_active_days = frame.entry_days() or 1
+    avg_entries_per_day = entry_count / num_active_days
+
+    return render_template(
+        "flames.html",
+        username=username,
+        user_id=ember_id,
+        total_minutes=total_minutes,
+        entry_count=entry_count,
+        avg_minutes=average_minutes,
+        top_day=calendar.day_name[most_active_day[0]],
+        top_day_minutes=most_active_day[1] // 60,
+        top_hour_range=hour_range(most_active_hour_range[0]),
+        hour_minutes=most_active_hour_range[1] // 60,
+        days=days,
+        avg_entries=avg_entries_per_day,
+    )
 
 
 @app.route("/flames/summary")
+@cached_page
 def flames_summary():
-    db = get_db_connection()
-    try:
-        with db.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT user_id, username, start_time, duration_sec
-                FROM voice_sessions
-                ORDER BY username
-            """
-            )
-            sessions = cursor.fetchall()
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(FLAMES_SUMMARY_SQL)
+        ember_rows = cursor.fetchall()
 
-        if not sessions:
-            return "<h3>활동 기록이 없습니다.</h3>"
+    if not ember_rows:
+        return "<h3>활동 기록이 없습니다.</h3>"
 
-        user_stats = defaultdict(
-            lambda: {"username": "", "total_seconds": 0, "entry_count": 0, "active_days": set()}
-        )
-
-        for row in sessions:
-            user_id, username, start_time, duration_sec = row
-            stats = user_stats[user_id]
-            stats["username"] = username
-            stats["total_seconds"] += duration_sec
-            stats["entry_count"] += 1
-            stats["active_days"].add(start_time.date())
-
-        summary = []
-        total_all_seconds = 0
-        ember_total_minutes_list = []
-
-        for user_id, stats in user_stats.items():
-            total_minutes = stats["total_seconds"] // 60
-            entry_count = stats["entry_count"]
-            active_days = len(stats["active_days"])
-            avg_minutes = total_minutes // entry_count if entry_count else 0
-            avg_entries_per_day = entry_count / active_days if active_days else 0
-
-            summary.append(
-                {
-                    "user_id": user_id,
-                    "username": stats["username"],
-                    "total_minutes": total_minutes,
-                    "entry_count": entry_count,
-                    "avg_minutes": avg_minutes,
-                    "active_days": active_days,
-                    "avg_entries": round(avg_entries_per_day, 2),
-                }
-            )
+    summary = []
+    total_all_seconds = 0
+    ember_total_minutes_list = []
 
-            ember_total_minutes_list.append(total_minutes)
-            total_all_seconds += stats["total_seconds"]
+    for user_id, username, total_seconds, entry_count, active_days in ember_rows:
+        total_seconds = int(total_seconds)
+        entry_count = int(entry_count)
+        total_minutes = total_seconds // 60
+        avg_minutes = total_minutes // entry_count if entry_count else 0
+        avg_entries_per_day = entry_count / active_days if active_days else 0
+
+        summary.append(
+            {
+                "user_id": user_id,
+                "username": username,
+                "total_minutes": total_minutes,
+                "entry_count": entry_count,
+                "avg_minutes": avg_minutes,
+                "active_days": active_days,
+                "avg_entries": round(avg_entries_per_day, 2),
+            }
+        )
 
-        # \U0001f4ca 전체 통계 계산
-        total_all_minutes = total_all_seconds // 60
-        total_embers = len(summary)
-        avg_minutes_per_ember = total_all_minutes // total_embers if total_embers else 0
+        ember_total_minutes_list.append(total_minutes)
+        total_all_seconds += total_seconds
 
-        max_ember = max(summary, key=lambda u: u["total_minutes"])
-        min_ember = min(summary, key=lambda u: u["total_minutes"])
+    # \U0001f4ca 전체 통계 계산
+    total_all_minutes = total_all_seconds // 60
+    total_embers = len(summary)
+    avg_minutes_per_ember = total_all_minutes // total_embers if total_embers else 0
 
-        std_dev = int(statistics.stdev(ember_total_minutes_list)) if len(ember_total_minutes_list) >= 2 else 0
+    max_ember = max(summary, key=lambda u: u["total_minutes"])
+    min_ember = min(summary, key=lambda u: u["total_minutes"])
 
-        overall_stats = {
-            "total_users": total_embers,
-            "total_all_minutes": total_all_minutes,
-            "avg_minutes_per_user": avg_minutes_per_ember,
-            "max_user": max_ember,
-            "min_user": min_ember,
-            "std_dev": std_dev,
-        }
-        summary.sort(key=lambda u: u["total_minutes"], reverse=True)
-        return render_template("flames_summary.html", summary=summary, overall=overall_stats)
+    std_dev = int(statistics.stdev(ember_total_minutes_list)) if len(ember_total_minutes_list) >= 2 else 0
 
-    finally:
-        db.close()
+    overall_stats = {
+        "total_users": total_embers,
+        "total_all_minutes": total_all_minutes,
+        "avg_minutes_per_user": avg_minutes_per_ember,
+        "max_user": max_ember,
+        "min_user": min_ember,
+        "std_dev": std_dev,
+    }
+    return render_template("flames_summary.html", summary=summary, overall=overall_stats)
 
 
 @app.route("/flames/heatmap")
+@cached_page
 def flames_heatmap():
-    db = get_db_connection()
-    try:
-        with db.cursor() as cursor:
-            now = datetime.now()
-            start_time = now - timedelta(days=7)
-
-            cursor.execute(
-                """
-                SELECT vs.user_id, tu.username, tu.nickname, vs.start_time
-                FROM voice_sessions vs
-                LEFT JOIN tracked_users tu ON vs.user_id = tu.user_id
-                WHERE vs.start_time >= %s
-            """,
-                (start_time,),
-            )
-            rows = cursor.fetchall()
+    db = get_db()
+    with db.cursor() as cursor:
+        now = datetime.now()
+        start_time = now - timedelta(days=6)
 
-        date_labels = [(now - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(6, -1, -1)]
-        heatmap = {date: [{"count": 0, "users": set()} for _ in range(24)] for date in date_labels}
+        cursor.execute(FLAMES_HEATMAP_SQL, (start_time.date(),))
+        rows = cursor.fetchall()
 
-        for user_id, username, nickname, start in rows:
-            date_str = start.strftime("%Y-%m-%d")
-            hour = start.hour
-            display_name = nickname or username
-            if date_str in heatmap:
-                cell = heatmap[date_str][hour]
-                cell["users"].add(display_name)
-                cell["count"] = len(cell["users"])
+    date_labels = [(now - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(6, -1, -1)]
+    heatmap = {date: [{"count": 0, "users": set()} for _ in range(24)] for date in date_labels}
 
-        for hour_cells in heatmap.values():
-            for cell in hour_cells:
-                cell["users"] = list(sorted(cell["users"]))
+    for user_id, username, nickname, session_username, bucket_date, hour in rows:
+        date_str = bucket_date.strftime("%Y-%m-%d")
+        display_name = nickname or username or session_username
+        if date_str in heatmap:
+            cell = heatmap[date_str][hour]
+            cell["users"].add(display_name)
+            cell["count"] = len(cell["users"])
 
-        return render_template("components/heatmap_component.html", heatmap=heatmap, date_labels=date_labels)
-    finally:
-        db.close()
+    for hour_cells in heatmap.values():
+        for cell in hour_cells:
+            cell["users"] = list(sorted(cell["users"]))
+
+    return render_template("components/heatmap_component.html", heatmap=heatmap, date_labels=date_labels)
+
+
+def fetch_flame_windows(now: datetime) -> List[Tuple[str, dict]]:
+    """Read the rollup once, newest first, and aggregate it for every FLAME_WINDOWS entry."""
+    cutoffs = window_cutoffs(FLAME_WINDOWS, now)
+    starts = [start for _, start in cutoffs]
+    query, args = flame_windows_query(None if None in starts else min(starts))
+
+    db = get_db()
+    with db.cursor(ProfiledSSCursor) as cursor:
+        cursor.execute(query, args)
+        return aggregate_windows(cursor, cutoffs)
 
 
 @app.route("/flames/focus")
+@cached_page
 def flames_focus_view():
-    now = datetime.now()
-
-    def get_focus_map(start_time):
-        db = get_db_connection()
-        try:
-            with db.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT user_id, start_time, duration_sec
-                    FROM voice_sessions
-                    WHERE start_time >= %s
-                """,
-                    (start_time,),
-                )
-                rows = cursor.fetchall()
-        finally:
-            db.close()
-
-        if not rows:
-            return {}, 0, 0, 0
-
-        total_duration = 0
-        time_blocks = defaultdict(int)
-        ember_totals = defaultdict(int)
-
-        for user_id, start, duration in rows:
-            key = start.hour
-            time_blocks[key] += duration
-            ember_totals[user_id] += duration
-            total_duration += duration
-
-        focus_map = {}
-        for hour in range(24):
-            dur = time_blocks.get(hour, 0)
-            if dur > 0:
-                percent = round(dur / total_duration * 100, 2)
-                focus_map[hour] = {"percent": percent}
-
-        sorted_embers = sorted(ember_totals.items(), key=lambda x: x[1], reverse=True)
-        top_n = math.ceil(len(sorted_embers) * 0.2)
-        top_duration = sum(x[1] for x in sorted_embers[:top_n])
-        top_ratio = round(top_duration / total_duration * 100, 2)
-
-        return focus_map, top_n, top_ratio, len(ember_totals)
-
-    ranges = [
-        ("1일", now - timedelta(days=1)),
-        ("7일", now - timedelta(days=7)),
-        ("30일", now - timedelta(days=30)),
-        ("전체", datetime(2020, 1, 1)),
-    ]
-
     focus_data = []
     pareto_data = []
 
-    for label, start_time in ranges:
-        fmap, top_n, top_ratio, total_embers = get_focus_map(start_time)
-        focus_data.append((label, fmap))
-        pareto_data.append({"label": label, "top_n": top_n, "top_ratio": top_ratio, "total_users": total_embers})
+    for label, stats in fetch_flame_windows(datetime.now()):
+        top_n = math.ceil(len(stats["users"]) * 0.2)
+        focus_data.append((label, hour_shares(stats) if stats["total"] else {}))
+        pareto_data.append(
+            {
+                "label": label,
+                "top_n": top_n,
+                "top_ratio": top_share(stats, top_n),
+                "total_users": len(stats["users"]),
+            }
+        )
 
     return render_template("components/focus_component.html", focus_data=focus_data, pareto_data=pareto_data)
 
 
 @app.route("/flames/pareto")
+@cached_page
 def flames_pareto_view():
-    now = datetime.now()
-    ranges = {
-        "1일": now - timedelta(days=1),
-        "7일": now - timedelta(days=7),
-        "30일": now - timedelta(days=30),
-        "전체": datetime(2020, 1, 1),
-    }
+    pareto_data = []
 
-    db = get_db_connection()
-    try:
-        with db.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT user_id, start_time, duration_sec
-                FROM voice_sessions
-            """
+    for label, stats in fetch_flame_windows(datetime.now()):
+        if not stats["total"]:
+            pareto_data.append((label, None))
+            continue
+
+        total_users = len(stats["users"])
+        pareto_data.append(
+            (
+                label,
+                {
+                    "top2": top_share(stats, 2),
+                    "top5": top_share(stats, 5),
+                    # calculate top 20% based on ember totals
+                    "top20pct": top_share(stats, max(1, int(total_users * 0.2))),
+                    "total_users": total_users,
+                },
             )
-            rows = cursor.fetchall()
+        )
 
-        pareto_data = []
+    return render_template("components/pareto_component.html", pareto_data=pareto_data)
 
-        for label, cutoff in ranges.items():
-            filtered = [(uid, dur) for uid, start, dur in rows if start >= cutoff]
-            if not filtered:
-                pareto_data.append((label, None))
-                continue
 
-            ember_totals = defaultdict(int)
-            for uid, dur in filtered:
-                ember_totals[uid] += dur
+@app.route("/stats/db_pool")
+def db_pool_stats():
+    return jsonify(db_pool.stats())
 
-            total_duration = sum(ember_totals.values())
-            sorted_embers = sorted(ember_totals.items(), key=lambda x: x[1], reverse=True)
 
-            def calc_ratio(top_n):
-                return round(sum(x[1] for x in sorted_embers[:top_n]) / total_duration * 100, 2)
+@app.route("/stats/bot_client")
+def bot_client_stats():
+    return jsonify(bot_client.stats())
 
-            top2 = calc_ratio(2)
-            top5 = calc_ratio(5)
-            # calculate top 20% based on ember totals
-            top20pct = calc_ratio(max(1, int(len(sorted_embers) * 0.2)))
 
-            pareto_data.append((label, {"top2": top2, "top5": top5, "top20pct": top20pct, "total_users": len(ember_totals)}))
+@app.route("/stats/flames_cache")
+def flames_cache_stats():
+    return jsonify(flames_cache.stats())
 
-        return render_template("components/pareto_component.html", pareto_data=pareto_data)
-    finally:
-        db.close()
+
+@app.route("/stats/queries")
+def query_stats():
+    """Statements with the most total time; ``?explain=N`` adds EXPLAIN for the top N SELECTs."""
+    n = request.args.get("n", 20, type=int)
+    explain = request.args.get("explain", 0, type=int)
+    return jsonify(QUERY_PROFILER.top(n, get_db() if explain else None, explain))
+
+
+@app.route("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 
 @app.route("/")
@@ -473,35 +539,38 @@ def home():
     return render_template("home.html")
 
 
+def render_kindle(bulk_target=None, bulk_results=None):
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(TRACKED_USERS_SQL)
+        embers = cursor.fetchall()
+        cursor.execute(ENABLED_CHANNELS_SQL)
+        pyres = cursor.fetchall()
+
+    return render_template(
+        "kindle.html",
+        embers=embers,
+        pyres=pyres,
+        bulk_target=bulk_target,
+        bulk_results=bulk_results,
+    )
+
+
 @app.route("/kindle")
 def kindle_page():
-    db = get_db_connection()
-    embers = []
-    pyres = []
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("SELECT user_id, username, nickname, role_name FROM tracked_users")
-            embers = cursor.fetchall()
-            cursor.execute("SELECT channel_id, name FROM tracked_channels WHERE enabled = TRUE")
-            pyres = cursor.fetchall()
-    finally:
-        db.close()
-
-    return render_template("kindle.html", embers=embers, pyres=pyres)
+    return render_kindle()
 
 
 @app.route("/kindle/add", methods=["POST"])
 def kindle_add():
     target = request.form.get("target")
-    db = get_db_connection()
 
     if target == "user":
         username = request.form.get("username")
         if not username:
             flash("잿불 이름을 입력해주세요.", "error")
         else:
-            res = requests.post(f"{BOT_API_URL}/verify_user", json={"name": username})
-            data = res.json()
+            data = bot_client.post("/verify_user", {"name": username})
             if data.get("success"):
                 flash(f"🔥 잿불 {username}이 피어올랐습니다 (ID: {data.get('user_id')})", "success")
             else:
@@ -512,8 +581,7 @@ def kindle_add():
         if not pyre_name:
             flash("장작더미 이름을 입력해주세요.", "error")
         else:
-            res = requests.post(f"{BOT_API_URL}/verify_channel", json={"name": pyre_name})
-            data = res.json()
+            data = bot_client.post("/verify_channel", {"name": pyre_name})
             if data.get("success"):
                 flash(f"🔥 장작더미 {pyre_name}이 추가되었습니다 (ID: {data.get('channel_id')})", "success")
             else:
@@ -522,25 +590,45 @@ def kindle_add():
     return redirect(url_for("kindle_page"))
 
 
+@app.route("/kindle/bulk_add", methods=["POST"])
+def kindle_bulk_add():
+    """Track many embers or pyres at once, one name per line."""
+    target = request.form.get("target")
+    names = [line.strip() for line in request.form.get("names", "").splitlines() if line.strip()]
+    if not names:
+        flash("이름을 한 줄에 하나씩 입력해주세요.", "error")
+        return redirect(url_for("kindle_page"))
+
+    if target == "user":
+        data = bot_client.post("/verify_users", {"names": names})
+    elif target == "channel":
+        data = bot_client.post("/verify_channels", {"names": names})
+    else:
+        return redirect(url_for("kindle_page"))
+
+    if not data.get("success"):
+        flash(f"❄️ 불씨가 꺼졌습니다: {data.get('reason')}", "error")
+        return redirect(url_for("kindle_page"))
+
+    return render_kindle(bulk_target=target, bulk_results=data.get("results", []))
+
+
 @app.route("/kindle/delete/ember/<int:ember_id>")
 def kindle_delete_ember(ember_id):
-    db = get_db_connection()
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("DELETE FROM tracked_users WHERE user_id = %s", (ember_id,))
-    finally:
-        db.close()
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(DELETE_TRACKED_USER_SQL, (ember_id,))
+        bump_sessions_version(cursor)
+    notify_bot("/untrack_user", {"user_id": ember_id})
     return redirect(url_for("kindle_page"))
 
 
 @app.route("/kindle/delete/pyre/<int:pyre_id>")
 def kindle_delete_pyre(pyre_id):
-    db = get_db_connection()
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("UPDATE tracked_channels SET enabled = FALSE WHERE channel_id = %s", (pyre_id,))
-    finally:
-        db.close()
+    db = get_db()
+    with db.cursor() as cursor:
+        cursor.execute(UNTRACK_CHANNEL_SQL, (pyre_id,))
+    notify_bot("/untrack_channel", {"channel_id": pyre_id})
     return redirect(url_for("kindle_page"))
 
 
@@ -557,8 +645,7 @@ def view_scars():
         token_exp = data.get("exp")
         if not user_id:
             return "<h3>유효하지 않은 토큰입니다.</h3>"
-        res = requests.get(f"{BOT_API_URL}/member_info/{user_id}")
-        info = res.json()
+        info = bot_client.get(f"/member_info/{user_id}")
         if not info.get("success"):
             return "<h3>멤버 정보를 불러올 수 없습니다.</h3>"
         viewer_name = info.get("display_name", "Unknown")
@@ -572,28 +659,34 @@ def view_scars():
     if not has_access:
         return "<h3>열람 권한이 없습니다.</h3>"
 
-    db = get_db_connection()
+    search = request.args.get("q", "").strip()
+    target = request.args.get("target", "").strip()
+    # reporter names are only visible (and filterable) for roles that may see them
+    reporter = request.args.get("reporter", "").strip() if show_reporter else ""
+    before = request.args.get("before", type=int)
+
+    query, args = scars_page_query(SCARS_PAGE_SIZE + 1, before, target, reporter, search)
+    db = get_db()
     notes = []
-    try:
-        with db.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT target_username, target_nickname, content, added_by_name
-                FROM scar_notes
-                ORDER BY id DESC
-                """
-            )
-            for row in cursor.fetchall():
-                notes.append(
-                    {
-                        "target_name": row[0],
-                        "target_nick": row[1],
-                        "description": row[2],
-                        "added_by_name": row[3],
-                    }
-                )
-    finally:
-        db.close()
+    with db.cursor() as cursor:
+        cursor.execute(query, args)
+        rows = cursor.fetchall()
+    for row in rows[:SCARS_PAGE_SIZE]:
+        notes.append(
+            {
+                "id": row[0],
+                "target_name": row[1],
+                "target_nick": row[2],
+                "description": row[3],
+                "added_by_name": row[4],
+            }
+        )
+
+    filters = {"token": token, "q": search, "target": target, "reporter": reporter}
+    filters = {k: v for k, v in filters.items() if v}
+    next_url = None
+    if len(rows) > SCARS_PAGE_SIZE:
+        next_url = url_for("view_scars", before=notes[-1]["id"], **filters)
 
     return render_template(
         "scars.html",
@@ -601,8 +694,14 @@ def view_scars():
         viewer_name=viewer_name,
         show_reporter=show_reporter,
         token_exp=token_exp,
+        token=token,
+        search=search,
+        target=target,
+        reporter=reporter,
+        first_url=url_for("view_scars", **filters) if before else None,
+        next_url=next_url,
     )
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
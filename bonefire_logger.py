@@ -1,13 +1,11 @@
 import discord
-from discord.ext import commands
-import pymysql
+from discord.ext import commands, tasks
 import json
 import asyncio
-import nest_asyncio
+import contextlib
 from fastapi import FastAPI, Request
+from fastapi.responses import Response
 import uvicorn
-from threading import Thread
-from discord.utils import get
 from discord import app_commands
 from datetime import datetime, timezone, timedelta
 import time
@@ -17,68 +15,145 @@ import queue
 import threading
 import os
 
+from bonefire_cache import BUMP_DATA_VERSION_SQL, SESSIONS_VERSION
+from bonefire_config import load_config
+from bonefire_db import DBExecutor, create_pool
+from bonefire_metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, REGISTRY
+from bonefire_migrate import migrate_from_config
+from bonefire_profiler import QUERY_PROFILER
+from bonefire_queries import (
+    ENABLED_CHANNEL_IDS_SQL,
+    INSERT_SCAR_SQL,
+    RECENT_SCARS_SQL,
+    TRACKED_CHANNEL_UPSERT,
+    TRACKED_USER_IDS_SQL,
+    TRACKED_USER_UPSERT,
+    UPSERT_SESSION_SQL,
+    stored_sessions_query,
+)
+from bonefire_rollup import UPSERT_ROLLUP_SQL, rollup_delta
+
 # ---------- Settings and Logging ----------
 KST = timezone(timedelta(hours=9))
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
 logger = logging.getLogger("bonefire_logger")
 
-CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = json.load(f)
-
-DISCORD_TOKEN = config["token"]
-DB_CONFIG = config.get("database")
-GUILD_ID = config.get("guild_id")
+# config.json is read by configure() at startup; the values below are defaults.
+config = None
+GUILD_ID = None
 DM_TARGET_ID = 358637116290367491
 HASTATI_ROLE_NAME = "━━♔⊱༻ 하스타티 ༺⊰♔━━"
 LEGATUS_ROLE_NAME = "✧˖*°࿐.*.｡ ⚔️레가투스⚔️.*.✧˖*°࿐"
-JWT_SECRET = config.get("jwt_secret", "change_me")
+JWT_SECRET = "change_me"
+REGISTRY_RESYNC_SEC = 300
+SESSION_FLUSH_SIZE = 50
+SESSION_FLUSH_INTERVAL_SEC = 2.0
+SESSION_QUEUE_WARN = 1000
+SESSION_JOURNAL_PATH = os.path.join(os.path.dirname(__file__), "open_sessions.journal")
+JOURNAL_HEARTBEAT_SEC = 60
+JOURNAL_COMPACT_AFTER = 5000
+MEMBER_INFO_TTL_SEC = 300
+MEMBER_INFO_CACHE_SIZE = 5000
+API_HOST = "0.0.0.0"
+API_PORT = 8000
+API_SHUTDOWN_TIMEOUT_SEC = 5
+
+# ---------- Metrics ----------
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "bonefire_db_query_seconds", "query_db/query_db_many calls, including pool checkout.", ("kind", "outcome")
+)
+VOICE_EVENTS = REGISTRY.counter(
+    "bonefire_voice_events_total", "Voice state updates by what they meant for tracking.", ("kind",)
+)
+VOICE_EVENT_SECONDS = REGISTRY.histogram(
+    "bonefire_voice_event_seconds",
+    "Time spent in on_voice_state_update.",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1),
+)
+SESSIONS = REGISTRY.counter("bonefire_sessions_total", "Finished voice sessions.", ("outcome",))
 
 # ---------- Connection Pool ----------
-class SimpleConnectionPool:
-    def __init__(self, maxsize, **db_config):
-        self._pool = queue.Queue(maxsize)
-        self._lock = threading.Lock()
-        self._db_config = db_config
-        for _ in range(maxsize):
-            self._pool.put(self._create_connection())
+# created by configure()
+db_pool = None
+db_executor = None
+# returned by query_db / aquery_db when the statement failed or timed out;
+# a write that succeeded returns None
+DB_FAILED = object()
 
-    def _create_connection(self):
-        return pymysql.connect(**self._db_config)
+def query_db(query, args=None, fetch=False):
+    """Run one statement and commit. Returns the rows for ``fetch``, ``DB_FAILED`` on error."""
+    started = time.perf_counter()
+    try:
+        with db_pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, args or ())
+                result = cursor.fetchall() if fetch else None
+            conn.commit()
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, kind="query", outcome="ok")
+        return result
+    except Exception as e:
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, kind="query", outcome="error")
+        logger.error(f"DB Error: {e}")
+        return DB_FAILED
 
-    def get(self):
-        with self._lock:
-            if self._pool.empty():
-                return self._create_connection()
-            return self._pool.get()
+async def aquery_db(query, args=None, fetch=False, timeout=None):
+    """``query_db`` for coroutines: runs on the DB executor instead of the event loop."""
+    try:
+        return await db_executor.run(query_db, query, args, fetch, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"DB Timeout: {' '.join(query.split())[:80]}")
+        return DB_FAILED
 
-    def put(self, conn):
-        with self._lock:
-            try:
-                self._pool.put_nowait(conn)
-            except queue.Full:
-                conn.close()
+def log_pool_warmup(future):
+    """Done-callback for the startup ``db_pool.warmup`` that runs in the background."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error(f"DB 커넥션 풀 예열 실패: {error!r}")
+    else:
+        logger.info(f"🔌 DB 커넥션 {future.result()}개 예열")
+
+async def aquery_db_many(statements, timeout=None):
+    """``query_db_many`` for coroutines. Returns False on failure or timeout."""
+    try:
+        return await db_executor.run(query_db_many, statements, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.error("DB Timeout: batch write")
+        return False
 
-DB_CONFIG.setdefault("autocommit", True)
-db_pool = SimpleConnectionPool(maxsize=10, **DB_CONFIG)
+def query_db_many(statements):
+    """Run ``(query, rows)`` pairs with ``executemany`` in one transaction.
 
-def query_db(query, args=None, fetch=False):
-    conn = db_pool.get()
+    PyMySQL rewrites ``INSERT ... VALUES (...)`` into a single multi-row
+    insert. Returns False (and rolls back) if any statement failed.
+    """
+
+    def run(cursor):
+        for query, rows in statements:
+            if rows:
+                cursor.executemany(query, rows)
+
+    return query_db_transaction(run)
+
+def query_db_transaction(work):
+    """Call ``work(cursor)`` inside one transaction. Returns False (and rolls back) if it raised."""
+    started = time.perf_counter()
     try:
-        conn.ping(reconnect=True)
-        with conn.cursor() as cursor:
-            cursor.execute(query, args or ())
-            result = cursor.fetchall() if fetch else None
-        conn.commit()
-        return result
+        with db_pool.connection() as conn:
+            conn.begin()
+            try:
+                with conn.cursor() as cursor:
+                    work(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, kind="batch", outcome="ok")
+        return True
     except Exception as e:
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, kind="batch", outcome="error")
         logger.error(f"DB Error: {e}")
-    finally:
-        db_pool.put(conn)
+        return False
 
 def get_highest_role(member):
     roles = [r for r in member.roles if r.name != "@everyone"]
@@ -102,37 +177,390 @@ def has_scar_access(roles: list[str]) -> bool:
         ]
     )
 
+# ---------- Tracked Registry ----------
+class TrackedRegistry:
+    """In-memory copy of ``tracked_users`` and enabled ``tracked_channels``.
+
+    Voice events are checked against these sets instead of querying MySQL.
+    API routes update the sets directly and a periodic resync picks up
+    changes made elsewhere (e.g. by the dashboard).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = set()
+        self._channels = set()
+
+    def load(self):
+        """Reload both sets from the database. Returns False on DB error."""
+        users = query_db(TRACKED_USER_IDS_SQL, fetch=True)
+        channels = query_db(ENABLED_CHANNEL_IDS_SQL, fetch=True)
+        if users is DB_FAILED or channels is DB_FAILED:
+            return False
+        with self._lock:
+            self._users = {int(r[0]) for r in users}
+            self._channels = {int(r[0]) for r in channels}
+        return True
+
+    def has_user(self, user_id):
+        return int(user_id) in self._users
+
+    def has_channel(self, channel_id):
+        return int(channel_id) in self._channels
+
+    def add_user(self, user_id):
+        with self._lock:
+            self._users.add(int(user_id))
+
+    def remove_user(self, user_id):
+        with self._lock:
+            self._users.discard(int(user_id))
+
+    def add_channel(self, channel_id):
+        with self._lock:
+            self._channels.add(int(channel_id))
+
+    def remove_channel(self, channel_id):
+        with self._lock:
+            self._channels.discard(int(channel_id))
+
+    def counts(self):
+        return len(self._users), len(self._channels)
+
+tracked_registry = TrackedRegistry()
+
 def is_tracked_user(user_id):
-    result = query_db("SELECT 1 FROM tracked_users WHERE user_id = %s", (user_id,), fetch=True)
-    return bool(result)
+    return tracked_registry.has_user(user_id)
 
 def is_tracked_channel(channel_id):
-    result = query_db("SELECT 1 FROM tracked_channels WHERE channel_id = %s AND enabled = TRUE", (channel_id,), fetch=True)
-    return bool(result)
+    return tracked_registry.has_channel(channel_id)
+
+# ---------- Session Writer ----------
+class SessionWriter:
+    """Write-behind queue for finished voice sessions.
+
+    ``submit`` never touches the database; a background thread collects rows
+    and flushes them in batches once ``batch_size`` rows are pending or
+    ``flush_interval`` seconds have passed since the first pending row.
+    ``on_written(rows)`` is called from the writer thread with the rows
+    of every committed batch. Each flush is one transaction: a multi-row upsert keyed on
+    ``(user_id, start_time)`` plus the change that makes to
+    ``voice_rollup_hourly``, so a batch can be written twice without
+    counting it twice. Failed batches are rolled back and retried on the
+    next flush.
+    """
+
+    _STOP = object()
+
+    def __init__(self, batch_size, flush_interval, warn_depth, on_written=None):
+        self._queue = queue.Queue()
+        self._on_written = on_written
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._warn_depth = warn_depth
+        self._thread = None
+        self._retry = []
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "peak_depth": 0,
+            "last_flush_ms": 0.0,
+            "last_batch_size": 0,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, row):
+        self._queue.put_nowait(row)
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats["submitted"] += 1
+            if depth > self._stats["peak_depth"]:
+                self._stats["peak_depth"] = depth
+        if depth == self._warn_depth:
+            logger.warning(f"세션 기록 대기열 적체: {depth}건")
+
+    def stop(self, timeout=30):
+        """Flush everything still queued and stop the worker thread.
+
+        Returns the rows that could not be written. They are kept, not
+        dropped: ``on_written`` never saw them, so the session journal still
+        holds them and the next start submits them again.
+        """
+        if self._thread is None:
+            self._flush(self._drain([]))
+        else:
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.error("세션 기록 스레드 종료 대기 시간 초과")
+                return list(self._retry)
+            self._thread = None
+        unwritten = self._retry + self._drain([])
+        if unwritten:
+            logger.error(f"종료 시 기록하지 못한 세션 {len(unwritten)}건은 저널에 남겨 다음 실행 때 기록합니다")
+        return unwritten
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["retry_pending"] = len(self._retry)
+        return stats
+
+    def _drain(self, batch):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch
+            if item is not self._STOP:
+                batch.append(item)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is self._STOP:
+                self._flush(self._drain(batch))
+                return
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self._flush_interval
+            if (batch or self._retry) and (len(batch) >= self._batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None if not self._retry else time.monotonic() + self._flush_interval
+
+    def _flush(self, batch):
+        rows = self._retry + batch
+        self._retry = []
+        if not rows:
+            return
+        started = time.perf_counter()
+        ok = self._write(rows)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats["last_flush_ms"] = round(elapsed_ms, 2)
+            self._stats["last_batch_size"] = len(rows)
+            if ok:
+                self._stats["batches"] += 1
+                self._stats["written"] += len(rows)
+            else:
+                self._stats["failed_batches"] += 1
+        if not ok:
+            self._retry = rows
+            logger.error(f"세션 {len(rows)}건 기록 실패, 다음 주기에 재시도합니다")
+        elif self._on_written is not None:
+            self._on_written(rows)
+
+    def _write(self, rows):
+        # DATETIME keeps whole seconds; truncating here lets stored keys compare equal
+        latest = {}
+        for user_id, username, channel_id, channel_name, start, end, duration_sec in rows:
+            start, end = start.replace(tzinfo=None, microsecond=0), end.replace(tzinfo=None, microsecond=0)
+            latest[(user_id, start)] = (user_id, username, channel_id, channel_name, start, end, duration_sec)
+        rows = list(latest.values())
+
+        def write(cursor):
+            # the rollup only gets the change against what is already stored,
+            # so rewriting a batch that did commit (e.g. a lost COMMIT reply) is harmless
+            cursor.execute(*stored_sessions_query(latest))
+            previous = cursor.fetchall()
+            cursor.executemany(UPSERT_SESSION_SQL, rows)
+            rollup = rollup_delta([(r[0], r[1], r[2], r[4], r[5]) for r in rows], previous)
+            if rollup:
+                cursor.executemany(UPSERT_ROLLUP_SQL, rollup)
+            cursor.execute(BUMP_DATA_VERSION_SQL, (SESSIONS_VERSION,))
+
+        return query_db_transaction(write)
+
+session_writer = None  # created by configure()
+
+# ---------- Open Session Journal ----------
+class SessionJournal:
+    """Append-only JSON-lines journal of open voice sessions.
+
+    Every join appends an ``open`` record. A finished session gets an
+    ``end`` record carrying the whole row when it is handed to the session
+    writer, and a ``written`` record once the writer committed it; a session
+    too short to keep just gets ``close``. Replaying the file yields the
+    sessions that were open when the process stopped plus the finished ones
+    that never reached the database. ``alive`` records mark the last moment
+    the bot was known to be running; sessions whose member left while the
+    bot was down are closed at that time. The file is rewritten with only
+    the open and unwritten sessions once it grows past ``compact_after``
+    records.
+    """
+
+    def __init__(self, path, compact_after):
+        self._path = path
+        self._compact_after = compact_after
+        self._file = None
+        self._records = 0
+        # records of ended sessions not yet confirmed by the session writer
+        self._ended = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Replay the journal. Returns ``(sessions, last_alive, unwritten_rows)``."""
+        sessions = {}
+        last_alive = None
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return sessions, last_alive, []
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # a crash can leave a torn last line behind
+                logger.warning(f"손상된 세션 저널 레코드 무시: {line[:80]!r}")
+                continue
+            op = record.get("op")
+            if op == "open":
+                sessions[record["user_id"]] = {
+                    "start": datetime.fromisoformat(record["start"]),
+                    "username": record["username"],
+                    "channel_id": record["channel_id"],
+                    "channel_name": record["channel_name"],
+                }
+            elif op == "close":
+                sessions.pop(record["user_id"], None)
+            elif op == "end":
+                sessions.pop(record["user_id"], None)
+                self._ended[(record["user_id"], record["start"])] = record
+            elif op == "written":
+                self._ended.pop((record["user_id"], record["start"]), None)
+            elif op == "alive":
+                last_alive = datetime.fromisoformat(record["at"])
+        self._records = len(lines)
+        return sessions, last_alive, [self._row(record) for record in self._ended.values()]
+
+    def open(self, user_id, session):
+        self._append(self._open_record(user_id, session))
+
+    def close(self, user_id):
+        self._append({"op": "close", "user_id": user_id})
+
+    def end(self, row):
+        user_id, username, channel_id, channel_name, start, end, duration_sec = row
+        record = {
+            "op": "end",
+            "user_id": user_id,
+            "username": username,
+            "channel_id": channel_id,
+            "channel_name": channel_name,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "duration_sec": duration_sec,
+        }
+        with self._lock:
+            self._ended[(user_id, record["start"])] = record
+        self._append(record)
+
+    def written(self, rows):
+        """Mark ended sessions as committed; called by the session writer."""
+        for row in rows:
+            start = row[4].isoformat()
+            with self._lock:
+                if self._ended.pop((row[0], start), None) is None:
+                    continue
+            self._append({"op": "written", "user_id": row[0], "start": start})
+
+    def alive(self, at):
+        self._append({"op": "alive", "at": at.isoformat()})
+
+    def needs_compaction(self):
+        return self._records >= self._compact_after
+
+    def rewrite(self, sessions, at):
+        """Atomically replace the journal with the given open sessions."""
+        tmp_path = f"{self._path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for user_id, session in sessions.items():
+                    f.write(json.dumps(self._open_record(user_id, session), ensure_ascii=False) + "\n")
+                for record in self._ended.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.write(json.dumps({"op": "alive", "at": at.isoformat()}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.replace(tmp_path, self._path)
+            self._records = len(sessions) + len(self._ended) + 1
+
+    def shutdown(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @staticmethod
+    def _open_record(user_id, session):
+        return {
+            "op": "open",
+            "user_id": user_id,
+            "username": session["username"],
+            "channel_id": session["channel_id"],
+            "channel_name": session["channel_name"],
+            "start": session["start"].isoformat(),
+        }
+
+    @staticmethod
+    def _row(record):
+        return (
+            record["user_id"],
+            record["username"],
+            record["channel_id"],
+            record["channel_name"],
+            datetime.fromisoformat(record["start"]),
+            datetime.fromisoformat(record["end"]),
+            record["duration_sec"],
+        )
+
+    def _append(self, record):
+        # the session writer thread appends ``written`` records too
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self._path, "a", encoding="utf-8")
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._file.flush()
+                self._records += 1
+            except OSError as e:
+                logger.error(f"세션 저널 기록 실패: {e}")
+
+session_journal = None  # created by configure()
 
 def save_session(user_id, username, channel_id, channel_name, start, end):
     duration_sec = int((end - start).total_seconds())
     if duration_sec < 5:
+        SESSIONS.inc(outcome="too_short")
+        session_journal.close(user_id)
         return
 
-    existing = query_db("SELECT id FROM voice_sessions WHERE user_id = %s AND start_time = %s", (user_id, start), fetch=True)
-    if existing:
-        query_db(
-            """
-            UPDATE voice_sessions
-            SET end_time = %s, duration_sec = %s, created_at = %s
-            WHERE id = %s
-            """,
-            (end, duration_sec, end, existing[0][0]),
-        )
-    else:
-        query_db(
-            """
-            INSERT INTO voice_sessions (user_id, username, channel_id, channel_name, start_time, end_time, duration_sec)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """,
-            (user_id, username, channel_id, channel_name, start, end, duration_sec),
-        )
+    SESSIONS.inc(outcome="saved")
+    row = (user_id, username, channel_id, channel_name, start, end, duration_sec)
+    # journaled before it is queued, so a crash before the flush cannot lose it
+    session_journal.end(row)
+    session_writer.submit(row)
 
 def get_current_url():
     try:
@@ -153,7 +581,7 @@ def create_signed_link(member: discord.Member) -> str | None:
     token = jwt.encode(payload, JWT_SECRET, algorithm="HS256")
     return f"{url}/scars?token={token}"
 
-def add_scar_note(
+async def add_scar_note(
     target_user_id: str,
     target_username: str,
     target_nickname: str | None,
@@ -161,12 +589,9 @@ def add_scar_note(
     added_by_id: str,
     added_by_name: str,
 ):
-    """Insert a scar note about a user into the database."""
-    query_db(
-        """
-        INSERT INTO scar_notes (target_user_id, target_username, target_nickname, added_by_id, added_by_name, content)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """,
+    """Insert a scar note about a user into the database. Returns False on DB error."""
+    result = await aquery_db(
+        INSERT_SCAR_SQL,
         (
             target_user_id,
             target_username,
@@ -176,10 +601,210 @@ def add_scar_note(
             content,
         ),
     )
+    return result is not DB_FAILED
+
+# ---------- Member Info Cache ----------
+class MemberInfoCache:
+    """TTL cache of ``/member_info`` responses keyed by user id.
+
+    Entries are dropped when they expire, when the member changes
+    (``on_member_update``/``on_member_remove``) and, for role renames or
+    deletions, all at once. The oldest entry is evicted beyond ``maxsize``.
+    """
+
+    def __init__(self, ttl, maxsize):
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, user_id, info):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (time.monotonic() + self._ttl, info)
+            while len(self._entries) > self._maxsize:
+                del self._entries[next(iter(self._entries))]
+                self._stats["evictions"] += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0
+        return stats
+
+member_info_cache = None  # created by configure()
+
+# ---------- Guild Name Index ----------
+def normalize_name(name):
+    return name.strip().casefold()
+
+class GuildIndex:
+    """Case-insensitive name/nick -> member id and name -> voice channel id lookups.
+
+    Built in ``on_ready`` and kept current by member and channel events, so
+    ``/verify_user`` and ``/verify_channel`` no longer scan the guild.
+    Values are id sets, so ambiguous names resolve to every match.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}
+        self._nicks = {}
+        self._channels = {}
+
+    @staticmethod
+    def _add(index, key, value):
+        if key:
+            index.setdefault(normalize_name(key), set()).add(value)
+
+    @staticmethod
+    def _discard(index, key, value):
+        if key:
+            ids = index.get(normalize_name(key))
+            if ids is not None:
+                ids.discard(value)
+                if not ids:
+                    del index[normalize_name(key)]
+
+    def rebuild(self, guild):
+        names, nicks, channels = {}, {}, {}
+        for member in guild.members:
+            self._add(names, member.name, member.id)
+            self._add(nicks, member.nick, member.id)
+        for channel in guild.voice_channels:
+            self._add(channels, channel.name, channel.id)
+        with self._lock:
+            self._names, self._nicks, self._channels = names, nicks, channels
+
+    def add_member(self, member):
+        with self._lock:
+            self._add(self._names, member.name, member.id)
+            self._add(self._nicks, member.nick, member.id)
+
+    def remove_member(self, member):
+        with self._lock:
+            self._discard(self._names, member.name, member.id)
+            self._discard(self._nicks, member.nick, member.id)
+
+    def rename_user(self, user_id, old_name, new_name):
+        with self._lock:
+            self._discard(self._names, old_name, user_id)
+            self._add(self._names, new_name, user_id)
+
+    def add_channel(self, channel):
+        with self._lock:
+            self._add(self._channels, channel.name, channel.id)
+
+    def remove_channel(self, channel):
+        with self._lock:
+            self._discard(self._channels, channel.name, channel.id)
+
+    def member_ids(self, name):
+        """Ids whose username matches ``name``; falls back to nicknames."""
+        key = normalize_name(name)
+        with self._lock:
+            return set(self._names.get(key) or self._nicks.get(key) or ())
+
+    def channel_ids(self, name):
+        with self._lock:
+            return set(self._channels.get(normalize_name(name), ()))
+
+guild_index = GuildIndex()
+
+def pick_exact(candidates, name, *attrs):
+    """Narrow ambiguous case-insensitive matches to a single exact-case match if there is one."""
+    if len(candidates) <= 1:
+        return candidates
+    exact = [c for c in candidates if any(getattr(c, attr, None) == name for attr in attrs)]
+    return exact if len(exact) == 1 else candidates
 
 # ---------- FastAPI ----------
 app = FastAPI()
-nest_asyncio.apply()
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
+BULK_VERIFY_LIMIT = 200
+
+def resolve_member(name):
+    """Return ``(member, None)`` or ``(None, failure_response)`` for a user name or nick."""
+    members = [m for m in map(bot.guild.get_member, guild_index.member_ids(name)) if m is not None]
+    members = pick_exact(members, name, "name", "nick")
+    if not members:
+        return None, {"success": False, "reason": "not_found"}
+    if len(members) > 1:
+        return None, {
+            "success": False,
+            "reason": "ambiguous",
+            "matches": [{"user_id": m.id, "name": m.name, "nick": m.nick} for m in members],
+        }
+    return members[0], None
+
+def resolve_channel(name):
+    """Return ``(channel, None)`` or ``(None, failure_response)`` for a voice channel name."""
+    channels = [c for c in map(bot.guild.get_channel, guild_index.channel_ids(name)) if c is not None]
+    channels = pick_exact(channels, name, "name")
+    if not channels:
+        return None, {"success": False, "reason": "not_found"}
+    if len(channels) > 1:
+        return None, {
+            "success": False,
+            "reason": "ambiguous",
+            "matches": [{"channel_id": c.id, "name": c.name} for c in channels],
+        }
+    return channels[0], None
+
+async def read_names(request):
+    """Parse ``{"names": [...]}`` into a de-duplicated name list, or return a failure response."""
+    data = await request.json()
+    names = data.get("names")
+    if not isinstance(names, list):
+        return None, {"success": False, "reason": "no_names"}
+    names = list(dict.fromkeys(n.strip() for n in names if isinstance(n, str) and n.strip()))
+    if not names:
+        return None, {"success": False, "reason": "no_names"}
+    if len(names) > BULK_VERIFY_LIMIT:
+        return None, {"success": False, "reason": "too_many"}
+    return names, None
 
 @app.post("/verify_user")
 async def verify_user(request: Request):
@@ -187,48 +812,117 @@ async def verify_user(request: Request):
         return {"success": False, "reason": "Bot not ready"}
     data = await request.json()
     name = data.get("name")
-    if not name:
+    if not isinstance(name, str) or not name.strip():
         return {"success": False, "reason": "no_name"}
 
-    member = get(bot.guild.members, name=name) or get(bot.guild.members, nick=name)
-    if not member:
-        return {"success": False, "reason": "not_found"}
+    member, failure = resolve_member(name)
+    if failure:
+        return failure
 
-    query_db(
-        """
-        INSERT INTO tracked_users (user_id, username, nickname, role_name)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE username=VALUES(username), nickname=VALUES(nickname), role_name=VALUES(role_name)
-        """,
-        (member.id, member.name, member.nick, get_highest_role(member)),
-    )
+    row = (member.id, member.name, member.nick, get_highest_role(member))
+    if await aquery_db(TRACKED_USER_UPSERT, row) is DB_FAILED:
+        return {"success": False, "reason": "db_error"}
+    tracked_registry.add_user(member.id)
 
     return {"success": True, "user_id": member.id}
 
+@app.post("/verify_users")
+async def verify_users(request: Request):
+    """Resolve a list of user names and track every match with one multi-row upsert."""
+    if bot.guild is None:
+        return {"success": False, "reason": "Bot not ready"}
+    names, failure = await read_names(request)
+    if failure:
+        return failure
+
+    results = []
+    members = {}
+    for name in names:
+        member, failure = resolve_member(name)
+        if failure:
+            results.append({"name": name, **failure})
+            continue
+        members[member.id] = member
+        results.append({"name": name, "success": True, "user_id": member.id})
+
+    if members:
+        rows = [(m.id, m.name, m.nick, get_highest_role(m)) for m in members.values()]
+        if not await aquery_db_many([(TRACKED_USER_UPSERT, rows)]):
+            return {"success": False, "reason": "db_error"}
+        for user_id in members:
+            tracked_registry.add_user(user_id)
+
+    return {"success": True, "results": results}
+
 @app.post("/verify_channel")
 async def verify_channel(request: Request):
     if bot.guild is None:
         return {"success": False, "reason": "Bot not ready"}
     data = await request.json()
     name = data.get("name")
-    if not name:
+    if not isinstance(name, str) or not name.strip():
         return {"success": False, "reason": "no_name"}
 
-    channel = get(bot.guild.voice_channels, name=name)
-    if not channel:
-        return {"success": False, "reason": "not_found"}
+    channel, failure = resolve_channel(name)
+    if failure:
+        return failure
 
-    query_db(
-        """
-        INSERT INTO tracked_channels (channel_id, name)
-        VALUES (%s, %s)
-        ON DUPLICATE KEY UPDATE name=VALUES(name), enabled=TRUE
-        """,
-        (channel.id, channel.name),
-    )
+    if await aquery_db(TRACKED_CHANNEL_UPSERT, (channel.id, channel.name)) is DB_FAILED:
+        return {"success": False, "reason": "db_error"}
+    tracked_registry.add_channel(channel.id)
 
     return {"success": True, "channel_id": channel.id}
 
+@app.post("/verify_channels")
+async def verify_channels(request: Request):
+    """Resolve a list of voice channel names and track every match with one multi-row upsert."""
+    if bot.guild is None:
+        return {"success": False, "reason": "Bot not ready"}
+    names, failure = await read_names(request)
+    if failure:
+        return failure
+
+    results = []
+    channels = {}
+    for name in names:
+        channel, failure = resolve_channel(name)
+        if failure:
+            results.append({"name": name, **failure})
+            continue
+        channels[channel.id] = channel
+        results.append({"name": name, "success": True, "channel_id": channel.id})
+
+    if channels:
+        rows = [(c.id, c.name) for c in channels.values()]
+        if not await aquery_db_many([(TRACKED_CHANNEL_UPSERT, rows)]):
+            return {"success": False, "reason": "db_error"}
+        for channel_id in channels:
+            tracked_registry.add_channel(channel_id)
+
+    return {"success": True, "results": results}
+
+
+@app.post("/untrack_user")
+async def untrack_user(request: Request):
+    """Drop a user from the tracked registry after the dashboard deleted it."""
+    data = await request.json()
+    user_id = data.get("user_id")
+    if user_id is None:
+        return {"success": False, "reason": "no_id"}
+    tracked_registry.remove_user(user_id)
+    return {"success": True}
+
+
+@app.post("/untrack_channel")
+async def untrack_channel(request: Request):
+    """Drop a channel from the tracked registry after the dashboard disabled it."""
+    data = await request.json()
+    channel_id = data.get("channel_id")
+    if channel_id is None:
+        return {"success": False, "reason": "no_id"}
+    tracked_registry.remove_channel(channel_id)
+    return {"success": True}
+
 
 @app.post("/notes")
 async def add_note(request: Request):
@@ -243,34 +937,84 @@ async def add_note(request: Request):
     ]
     if not all(key in data for key in required):
         return {"success": False, "reason": "missing_field"}
-    add_scar_note(
+    if not await add_scar_note(
         data["target_user_id"],
         data["target_username"],
         data.get("target_nickname"),
         data["content"],
         data["added_by_id"],
         data["added_by_name"],
-    )
+    ):
+        return {"success": False, "reason": "db_error"}
     return {"success": True}
 
 
+@app.get("/stats/session_writer")
+async def session_writer_stats():
+    """Return queue depth and flush counters of the session writer."""
+    return {"success": True, **session_writer.stats()}
+
+
+@app.get("/stats/db_pool")
+async def db_pool_stats():
+    """Return connection pool counters."""
+    return {"success": True, **db_pool.stats()}
+
+
+@app.get("/stats/db_executor")
+async def db_executor_stats():
+    """Return queue depth and timeout counters of the DB executor."""
+    return {"success": True, **db_executor.stats()}
+
+
 @app.get("/member_info/{user_id}")
 async def member_info(user_id: int):
     """Return display name and role list for a Discord member."""
     if bot.guild is None:
         return {"success": False, "reason": "Bot not ready"}
+    info = member_info_cache.get(user_id)
+    if info is not None:
+        return info
+
     member = bot.guild.get_member(user_id)
     if member is None:
         try:
-            member = await bot.fetch_member(user_id)
+            member = await bot.guild.fetch_member(user_id)
         except Exception:
             return {"success": False, "reason": "not_found"}
 
-    return {
+    info = {
         "success": True,
         "display_name": member.display_name,
         "roles": [r.name for r in member.roles],
     }
+    member_info_cache.put(user_id, info)
+    return info
+
+
+@app.get("/stats/member_info_cache")
+async def member_info_cache_stats():
+    """Return hit/miss counters of the member info cache."""
+    return {"success": True, **member_info_cache.stats()}
+
+def top_queries(n, explain):
+    if not explain:
+        return QUERY_PROFILER.top(n)
+    with db_pool.connection() as conn:
+        return QUERY_PROFILER.top(n, conn, explain)
+
+@app.get("/stats/queries")
+async def query_stats(n: int = 20, explain: int = 0):
+    """Statements with the most total time; ``explain=N`` adds EXPLAIN for the top N SELECTs."""
+    try:
+        return {"success": True, "queries": await db_executor.run(top_queries, n, explain)}
+    except asyncio.TimeoutError:
+        return {"success": False, "reason": "timeout"}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of the bot's metrics."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 # ---------- Discord Bot ----------
 class TrackingBot(discord.Client):
@@ -282,8 +1026,37 @@ class TrackingBot(discord.Client):
         super().__init__(intents=intents)
         self.tree = app_commands.CommandTree(self)
         self.user_sessions = {}
+        self.guild = None
+        self._last_alive = None
+        # the journal's sessions are reconciled only against a loaded registry
+        self._registry_loaded = False
+        self._reconciled = False
+        self._api_server = None
+        self._api_task = None
+        REGISTRY.register_stats("bonefire_voice", lambda: {"open_sessions": len(self.user_sessions)})
 
     async def setup_hook(self):
+        # not awaited, so startup does not wait on the database
+        warmup = asyncio.get_running_loop().run_in_executor(None, db_pool.warmup)
+        warmup.add_done_callback(log_pool_warmup)
+        self._registry_loaded = await self.reload_registry()
+        if self._registry_loaded:
+            users, channels = tracked_registry.counts()
+            logger.info(f"📋 추적 대상 로드: 잿불 {users}명, 장작더미 {channels}개")
+        else:
+            logger.error("추적 대상 로드 실패, 주기적 동기화에서 재시도합니다")
+        self.resync_registry.change_interval(seconds=REGISTRY_RESYNC_SEC)
+        self.resync_registry.start()
+        session_writer.start()
+        self.user_sessions, self._last_alive, unwritten = session_journal.load()
+        if self.user_sessions:
+            logger.info(f"📓 세션 저널에서 열린 세션 {len(self.user_sessions)}건 복구")
+        if unwritten:
+            logger.info(f"📓 기록이 확인되지 않은 종료 세션 {len(unwritten)}건 다시 기록")
+            for row in unwritten:
+                session_writer.submit(row)
+        self.start_api()
+
         @app_commands.command(name="bonefire", description="현재 화톳불 링크를 확인합니다.")
         @app_commands.guild_only()
         async def bonefire_command(interaction: discord.Interaction):
@@ -347,14 +1120,18 @@ class TrackingBot(discord.Client):
                 return
 
             await interaction.response.defer(ephemeral=True)
-            add_scar_note(
+            if not await add_scar_note(
                 str(target_user.id),
                 target_user.name,
                 target_user.nick,
                 note,
                 str(member.id),
                 member.name,
-            )
+            ):
+                await interaction.followup.send(
+                    "❗ 특이사항을 기록하지 못했습니다. 잠시 후 다시 시도해 주세요.", ephemeral=True
+                )
+                return
             await interaction.followup.send("✅ 특이사항이 기록되었습니다.", ephemeral=True)
 
         @app_commands.command(name="scars", description="특이사항 목록 링크를 받습니다")
@@ -385,11 +1162,13 @@ class TrackingBot(discord.Client):
                 )
                 return
 
-            records = query_db(
-                "SELECT content FROM scar_notes ORDER BY created_at DESC LIMIT 4",
-                fetch=True,
-            )
+            records = await aquery_db(RECENT_SCARS_SQL, fetch=True)
 
+            if records is DB_FAILED:
+                await interaction.response.send_message(
+                    "❗ 잔흔을 불러오지 못했습니다. 잠시 후 다시 시도해 주세요.", ephemeral=True
+                )
+                return
             if not records:
                 await interaction.response.send_message(
                     "🕯️ 아직 남겨진 잔흔이 없습니다.", ephemeral=True
@@ -420,12 +1199,139 @@ class TrackingBot(discord.Client):
         self.tree.add_command(glance_the_embers, guild=discord.Object(id=GUILD_ID))
         await self.tree.sync(guild=discord.Object(id=GUILD_ID))
 
+    def start_api(self):
+        """Serve the FastAPI app as a task on the bot's own loop, at most once."""
+        if self._api_task is not None and not self._api_task.done():
+            return
+        self._api_server = ApiServer(
+            uvicorn.Config(app, host=API_HOST, port=API_PORT, lifespan="off", log_config=None)
+        )
+        self._api_task = asyncio.create_task(self._serve_api(self._api_server), name="bonefire-api")
+
+    async def _serve_api(self, server):
+        try:
+            await server.serve()
+        except SystemExit:
+            # uvicorn exits the process when it cannot bind; keep the bot running
+            logger.error(f"❌ API 서버 시작 실패 (포트 {API_PORT})")
+
+    async def stop_api(self):
+        if self._api_task is None:
+            return
+        self._api_server.should_exit = True
+        try:
+            await asyncio.wait_for(self._api_task, API_SHUTDOWN_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            logger.warning("API 서버 종료 대기 시간 초과")
+        self._api_task = None
+
+    async def close(self):
+        await self.stop_api()
+        await super().close()
+        # stop the writer first so its last confirmations reach the journal
+        await asyncio.to_thread(session_writer.stop)
+        if self._reconciled:
+            session_journal.alive(datetime.now(KST))
+        session_journal.shutdown()
+        db_executor.shutdown(wait=False)
+
+    @tasks.loop(seconds=JOURNAL_HEARTBEAT_SEC)
+    async def journal_heartbeat(self):
+        now = datetime.now(KST)
+        if session_journal.needs_compaction():
+            session_journal.rewrite(self.user_sessions, now)
+        else:
+            session_journal.alive(now)
+
+    def reconcile_sessions(self):
+        """Match open sessions against who is actually in tracked voice channels.
+
+        Sessions whose member is gone are saved, ending at the last time the
+        bot was known to be alive. Members sitting in a tracked channel
+        without a session get a new one starting now.
+        """
+        now = datetime.now(KST)
+        present = {}
+        for channel in self.guild.voice_channels:
+            if not is_tracked_channel(channel.id):
+                continue
+            for member in channel.members:
+                if is_tracked_user(member.id):
+                    present[member.id] = (member, channel)
+
+        closed_at = self._last_alive or now
+        self._last_alive = None
+        closed = 0
+        for user_id, session in list(self.user_sessions.items()):
+            if user_id in present:
+                continue
+            save_session(
+                user_id,
+                session["username"],
+                session["channel_id"],
+                session["channel_name"],
+                session["start"],
+                max(session["start"], closed_at),
+            )
+            self.user_sessions.pop(user_id, None)
+            closed += 1
+
+        started = 0
+        for user_id, (member, channel) in present.items():
+            if user_id not in self.user_sessions:
+                self.user_sessions[user_id] = {
+                    "start": now,
+                    "username": member.name,
+                    "channel_id": channel.id,
+                    "channel_name": channel.name,
+                }
+                started += 1
+
+        session_journal.rewrite(self.user_sessions, now)
+        logger.info(
+            f"📓 세션 정합성 확인: 유지 {len(self.user_sessions) - started}건, 종료 {closed}건, 신규 {started}건"
+        )
+
+    def start_session_tracking(self):
+        """Reconcile the journal's sessions and start the journal heartbeat."""
+        self.reconcile_sessions()
+        self._reconciled = True
+        if not self.journal_heartbeat.is_running():
+            self.journal_heartbeat.start()
+
+    async def reload_registry(self):
+        try:
+            return await db_executor.run(tracked_registry.load)
+        except asyncio.TimeoutError:
+            return False
+
+    @tasks.loop(seconds=REGISTRY_RESYNC_SEC)
+    async def resync_registry(self):
+        if not await self.reload_registry():
+            logger.error("추적 대상 동기화 실패")
+            return
+        if not self._registry_loaded:
+            self._registry_loaded = True
+            logger.info("📋 추적 대상 로드 완료, 미뤄 둔 세션 정합성 확인을 진행합니다")
+            if self.guild is not None:
+                self.start_session_tracking()
+
+    @resync_registry.before_loop
+    async def before_resync_registry(self):
+        await self.wait_until_ready()
+
     async def on_ready(self):
         self.guild = discord.utils.get(self.guilds, id=GUILD_ID)
         logger.info(f"🤖 봇 로그인 완료: {self.user} (서버: {self.guild.name})")
-        Thread(target=run_api, daemon=True).start()
+        guild_index.rebuild(self.guild)
+        if self._registry_loaded:
+            self.start_session_tracking()
+        else:
+            # with an empty registry every journaled session would look finished
+            logger.warning("추적 대상을 불러오지 못해 세션 정합성 확인을 첫 동기화 이후로 미룹니다")
 
     async def on_voice_state_update(self, member, before, after):
+        started = time.perf_counter()
         now = datetime.now(KST)
         user_id = member.id
         username = member.name
@@ -434,6 +1340,13 @@ class TrackingBot(discord.Client):
         after_tracked = after.channel and is_tracked_channel(after.channel.id)
         tracked_user = is_tracked_user(user_id)
 
+        kind = "ignored"
+        if tracked_user and before_tracked and after_tracked:
+            kind = "move" if before.channel.id != after.channel.id else "state"
+        elif tracked_user and (before_tracked or after_tracked):
+            kind = "leave" if before_tracked else "join"
+        VOICE_EVENTS.inc(kind=kind)
+
         if before_tracked and tracked_user and (after.channel is None or not after_tracked):
             session = self.user_sessions.get(user_id)
             if session:
@@ -451,12 +1364,24 @@ class TrackingBot(discord.Client):
         if after_tracked and tracked_user and (before.channel is None or not before_tracked):
             self.user_sessions[user_id] = {
                 "start": now,
+                "username": username,
                 "channel_id": after.channel.id,
                 "channel_name": after.channel.name,
             }
+            session_journal.open(user_id, self.user_sessions[user_id])
             logger.info(f"[입장] {username} → {after.channel.name} @ {now}")
 
+        VOICE_EVENT_SECONDS.observe(time.perf_counter() - started)
+
+    async def on_member_join(self, member: discord.Member):
+        if member.guild.id == GUILD_ID:
+            guild_index.add_member(member)
+
     async def on_member_update(self, before: discord.Member, after: discord.Member):
+        member_info_cache.invalidate(after.id)
+        if after.guild.id == GUILD_ID and (before.name != after.name or before.nick != after.nick):
+            guild_index.remove_member(before)
+            guild_index.add_member(after)
         if before.nick != after.nick:
             before_nick = before.nick if before.nick is not None else before.name
             after_nick = after.nick if after.nick is not None else after.name
@@ -475,14 +1400,102 @@ class TrackingBot(discord.Client):
                 except Exception as e:
                     logger.error(f"닉변 DM 전송 실패: {e}")
 
+    async def on_member_remove(self, member: discord.Member):
+        member_info_cache.invalidate(member.id)
+        if member.guild.id == GUILD_ID:
+            guild_index.remove_member(member)
+
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        if before.name != after.name:
+            guild_index.rename_user(after.id, before.name, after.name)
+            member_info_cache.invalidate(after.id)
+
+    async def on_guild_channel_create(self, channel):
+        if isinstance(channel, discord.VoiceChannel) and channel.guild.id == GUILD_ID:
+            guild_index.add_channel(channel)
+
+    async def on_guild_channel_update(self, before, after):
+        if isinstance(after, discord.VoiceChannel) and after.guild.id == GUILD_ID and before.name != after.name:
+            guild_index.remove_channel(before)
+            guild_index.add_channel(after)
+
+    async def on_guild_channel_delete(self, channel):
+        if isinstance(channel, discord.VoiceChannel) and channel.guild.id == GUILD_ID:
+            guild_index.remove_channel(channel)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name:
+            member_info_cache.clear()
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        member_info_cache.clear()
+
 # ---------- Run ----------
-def run_api():
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+class ApiServer(uvicorn.Server):
+    """uvicorn server that leaves SIGINT/SIGTERM to discord.py, which closes it via ``TrackingBot.close``."""
+
+    def install_signal_handlers(self):  # uvicorn < 0.29
+        pass
+
+    @contextlib.contextmanager
+    def capture_signals(self):  # uvicorn >= 0.29
+        yield
+
+def configure(cfg=None):
+    """Load config and create the bot's pool, DB executor, session writer, journal and cache.
+
+    Called once at startup rather than at import, so the module (and its
+    helpers) can be imported without config.json or a database. ``cfg``
+    replaces config.json.
+    """
+    global config, GUILD_ID, JWT_SECRET, REGISTRY_RESYNC_SEC
+    global db_pool, db_executor, session_writer, session_journal, member_info_cache
+    cfg = load_config() if cfg is None else cfg
+
+    GUILD_ID = cfg.get("guild_id")
+    JWT_SECRET = cfg.get("jwt_secret", JWT_SECRET)
+    REGISTRY_RESYNC_SEC = cfg.get("registry_resync_sec", REGISTRY_RESYNC_SEC)
+    db_pool = create_pool(cfg, 10, **{"autocommit": True, **cfg.get("database", {})})
+    db_executor = DBExecutor(
+        workers=cfg.get("db_workers", 10),
+        max_in_flight=cfg.get("db_max_in_flight", 100),
+        timeout=cfg.get("db_timeout_sec", 10),
+    )
+    session_journal = SessionJournal(cfg.get("session_journal_path", SESSION_JOURNAL_PATH), JOURNAL_COMPACT_AFTER)
+    session_writer = SessionWriter(
+        cfg.get("session_flush_size", SESSION_FLUSH_SIZE),
+        cfg.get("session_flush_interval_sec", SESSION_FLUSH_INTERVAL_SEC),
+        cfg.get("session_queue_warn", SESSION_QUEUE_WARN),
+        on_written=session_journal.written,
+    )
+    member_info_cache = MemberInfoCache(cfg.get("member_info_ttl_sec", MEMBER_INFO_TTL_SEC), MEMBER_INFO_CACHE_SIZE)
+    QUERY_PROFILER.configure(
+        slow_ms=cfg.get("slow_query_ms", 200),
+        enabled=cfg.get("query_profiler", True),
+        log_path=cfg.get("slow_query_log"),
+    )
+    REGISTRY.register_stats("bonefire_db_pool", db_pool.stats)
+    REGISTRY.register_stats("bonefire_queries", QUERY_PROFILER.stats)
+    REGISTRY.register_stats("bonefire_db_executor", db_executor.stats)
+    REGISTRY.register_stats("bonefire_session_writer", session_writer.stats)
+    REGISTRY.register_stats("bonefire_member_info_cache", member_info_cache.stats)
+    config = cfg
+    return cfg
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
     bot = TrackingBot()
     try:
+        cfg = configure()
+        if cfg.get("auto_migrate", True):
+            applied = migrate_from_config(cfg)
+            if applied:
+                logger.info(f"🗄️ 스키마 마이그레이션 {applied}건 적용")
         logger.info("🎯 봇 실행 시작")
-        bot.run(DISCORD_TOKEN)
+        bot.run(cfg["token"])
     except Exception as e:
         logger.error(f"❌ 봇 실행 중 오류 발생: {e}")
@@ -0,0 +1,291 @@
+"""Versioned schema migrations and an index check for the hot queries.
+
+``migrations/NNN_name.sql`` files are applied in version order and
+recorded in ``schema_migrations``. Statements that fail only because
+their table, column or index already exists are skipped, so databases
+that had files applied by hand catch up without a baseline step. That
+only works if every statement makes a single change (one table, column
+or index), so an existing one cannot hide the rest. The bot applies
+pending migrations at startup unless ``auto_migrate`` is false.
+
+    python bonefire_migrate.py status
+    python bonefire_migrate.py up
+    python bonefire_migrate.py check
+
+``check`` runs ``EXPLAIN`` on every statement in :func:`hot_queries` (the
+app's own SQL) and fails if one has to scan a table without any usable
+index, unless it is meant to read the whole table.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+import pymysql
+
+from bonefire_cache import DATA_VERSION_SQL, SESSIONS_VERSION
+from bonefire_config import load_config
+from bonefire_queries import (
+    DELETE_TRACKED_USER_SQL,
+    DELETE_USER_ROLLUP_SQL,
+    DELETE_USER_SESSIONS_SQL,
+    EMBER_LIST_SQL,
+    ENABLED_CHANNEL_IDS_SQL,
+    ENABLED_CHANNELS_SQL,
+    FLAMES_HEATMAP_SQL,
+    FLAMES_RANGE_SQL,
+    FLAMES_SUMMARY_SQL,
+    RECENT_SCARS_SQL,
+    TRACKED_USER_IDS_SQL,
+    TRACKED_USERS_SQL,
+    UNTRACK_CHANNEL_SQL,
+    flame_windows_query,
+    scars_page_query,
+    stored_sessions_query,
+)
+from bonefire_rollup import backfill_query
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+LOCK_NAME = "bonefire_migrate"
+LOCK_TIMEOUT_SEC = 60
+# table exists, duplicate column, duplicate key name, duplicate key
+ALREADY_APPLIED_ERRORS = {1050, 1060, 1061, 1068}
+
+logger = logging.getLogger("bonefire_migrate")
+
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+CREATE_HISTORY_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+      version    INT          NOT NULL PRIMARY KEY,
+      name       VARCHAR(255) NOT NULL,
+      checksum   CHAR(40)     NOT NULL,
+      applied_at DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) DEFAULT CHARSET = utf8mb4
+"""
+
+
+def hot_queries() -> List[Tuple[str, str, tuple, bool]]:
+    """``(name, query, sample args, reads_whole_table)`` for the statements the bot and dashboard run.
+
+    The statements come from :mod:`bonefire_queries` and the other modules
+    that run them, so this list cannot drift from the app. Inserts are left
+    out; their unique keys are checked by the lookups that share them.
+    """
+    now = datetime.now()
+    week_ago = now - timedelta(days=7)
+    queries = [
+        ("registry users", TRACKED_USER_IDS_SQL, (), True),
+        ("registry pyres", ENABLED_CHANNEL_IDS_SQL, (), False),
+        ("embers list", TRACKED_USERS_SQL, (), True),
+        ("pyres list", ENABLED_CHANNELS_SQL, (), False),
+        ("untrack ember", DELETE_TRACKED_USER_SQL, (0,), False),
+        ("untrack pyre", UNTRACK_CHANNEL_SQL, (0,), False),
+        ("delete ember sessions", DELETE_USER_SESSIONS_SQL, (0,), False),
+        ("delete ember rollup", DELETE_USER_ROLLUP_SQL, (0,), False),
+        ("stored sessions", *stored_sessions_query([(0, week_ago), (1, now)]), False),
+        ("sessions version", DATA_VERSION_SQL, (SESSIONS_VERSION,), False),
+        ("rollup backfill since", *backfill_query(week_ago.date()), False),
+        ("flames_ember_list", EMBER_LIST_SQL, (), False),
+        ("flames_range", FLAMES_RANGE_SQL, (0, week_ago, now), False),
+        ("flames_summary", FLAMES_SUMMARY_SQL, (), True),
+        ("flames_heatmap", FLAMES_HEATMAP_SQL, (week_ago.date(),), False),
+        ("flames windows", *flame_windows_query(week_ago), False),
+        ("flames windows all", *flame_windows_query(None), True),
+        ("glance_the_embers", RECENT_SCARS_SQL, (), False),
+    ]
+    # every combination of the /scars filters
+    filters = ("before", "target", "reporter", "search")
+    for mask in range(16):
+        before, target, reporter, search = (bool(mask & 1 << i) for i in range(4))
+        name = "+".join(f for i, f in enumerate(filters) if mask & 1 << i)
+        query, args = scars_page_query(
+            51,
+            before=1 << 62 if before else None,
+            target="ember" if target else "",
+            reporter="ember" if reporter else "",
+            search="불꽃" if search else "",
+        )
+        queries.append((f"scars {name or 'page'}", query, args, False))
+    return queries
+
+
+# ---------- Migrations ----------
+def discover(directory: str = MIGRATIONS_DIR) -> List[Tuple[int, str, str]]:
+    """``(version, name, path)`` for every migration file, in version order."""
+    found = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match:
+            found.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    found.sort()
+    versions = [v for v, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"duplicate migration versions in {directory}")
+    return found
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a migration file on ``;`` line endings, dropping ``--`` comment lines."""
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith("--")]
+    return [s.strip() for s in re.split(r";\s*(?:\n|$)", "\n".join(lines)) if s.strip()]
+
+
+def checksum(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def applied_versions(conn) -> dict:
+    with conn.cursor() as cursor:
+        cursor.execute(CREATE_HISTORY_SQL)
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        return dict(cursor.fetchall())
+
+
+def pending(conn) -> List[Tuple[int, str, str]]:
+    done = applied_versions(conn)
+    return [m for m in discover() if m[0] not in done]
+
+
+def apply_migration(conn, version: int, name: str, path: str) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        statements = split_statements(f.read())
+    with conn.cursor() as cursor:
+        for statement in statements:
+            try:
+                cursor.execute(statement)
+            except pymysql.MySQLError as e:
+                if e.args and e.args[0] in ALREADY_APPLIED_ERRORS:
+                    logger.info("↷ %03d %s: already applied (%s)", version, name, e.args[1])
+                    continue
+                raise
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+            (version, name, checksum(path)),
+        )
+    conn.commit()
+    logger.info("✅ migration %03d %s applied", version, name)
+
+
+def migrate(conn) -> int:
+    """Apply every pending migration; returns how many ran.
+
+    MySQL commits DDL immediately, so a migration that fails halfway is
+    not rolled back; fix the cause and rerun, and the statements that
+    already ran are skipped as already applied.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT_SEC))
+        if not cursor.fetchone()[0]:
+            raise RuntimeError("another process is applying migrations")
+    try:
+        todo = pending(conn)
+        for version, name, path in todo:
+            apply_migration(conn, version, name, path)
+        return len(todo)
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+
+
+def connect(config: dict):
+    return pymysql.connect(**{"charset": "utf8mb4", **config["database"], "autocommit": False})
+
+
+def migrate_from_config(config: dict) -> int:
+    if config.get("storage", "mysql") == "sqlite":
+        return 0  # SQLitePool applies migrations/sqlite_schema.sql itself
+    conn = connect(config)
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
+
+
+# ---------- Index check ----------
+def explain(conn, query: str, args: tuple) -> List[dict]:
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("EXPLAIN " + query, args)
+        return cursor.fetchall()
+
+
+def judge(plan: List[dict]) -> Tuple[str, str]:
+    """``("ok" | "warn" | "fail", detail)`` for one EXPLAIN result.
+
+    A full scan (``type=ALL``) fails when the table has no usable index at
+    all and only warns when one exists, since MySQL prefers scanning tiny
+    tables even when an index would do.
+    """
+    verdict = "ok"
+    details = []
+    for row in plan:
+        table = row.get("table") or ""
+        if table.startswith("<"):
+            continue
+        access, key = row.get("type"), row.get("key")
+        if access == "ALL" and not key:
+            if row.get("possible_keys"):
+                verdict = "warn" if verdict == "ok" else verdict
+                details.append(f"{table}: scan, optimizer skipped {row['possible_keys']} (rows={row.get('rows')})")
+            else:
+                verdict = "fail"
+                details.append(f"{table}: full scan, no usable index (rows={row.get('rows')})")
+        else:
+            details.append(f"{table}: {access} via {key}")
+    return verdict, "; ".join(details) or (plan[0].get("Extra", "") if plan else "")
+
+
+def check(conn) -> bool:
+    failed = False
+    for name, query, args, reads_whole_table in hot_queries():
+        try:
+            verdict, detail = judge(explain(conn, query, args))
+        except pymysql.MySQLError as e:
+            verdict, detail = "fail", str(e)
+        else:
+            if reads_whole_table and verdict != "ok":
+                verdict, detail = "ok", f"{detail} (reads the whole table by design)"
+        failed = failed or verdict == "fail"
+        print(f"{verdict.upper():5} {name:36} {detail}")
+    return not failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["status", "up", "check"], nargs="?", default="status")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    config = load_config()
+    if config.get("storage", "mysql") == "sqlite":
+        parser.exit(message="storage is sqlite: the schema is applied when the bot or dashboard connects\n")
+    conn = connect(config)
+    try:
+        if args.command == "up":
+            logger.info("🔥 %d migration(s) applied", migrate(conn))
+        elif args.command == "check":
+            if not check(conn):
+                sys.exit(1)
+        else:
+            done = applied_versions(conn)
+            for version, name, path in discover():
+                state = "pending"
+                if version in done:
+                    state = "applied" if done[version] == checksum(path) else "applied (file changed since)"
+                print(f"{version:03d} {name:32} {state}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
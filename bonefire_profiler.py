@@ -0,0 +1,186 @@
+"""Per-statement query profiling shared by the bot and the dashboard.
+
+Every statement run through :class:`bonefire_db.ProfiledCursor` (the
+pool's default cursor) is timed and grouped by its fingerprint: the SQL
+with literals, placeholders and ``IN``/``VALUES`` lists collapsed, so
+``WHERE user_id = 1`` and ``WHERE user_id = 2`` count as one query.
+Statements slower than ``slow_ms`` go to the ``bonefire_slow_query``
+logger with their arguments redacted to type names. :meth:`QueryProfiler.top`
+lists the fingerprints with the most total time; for SELECTs it can also
+attach ``EXPLAIN`` output for the slowest call seen.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import List, Optional
+
+import pymysql
+
+
+slow_logger = logging.getLogger("bonefire_slow_query")
+
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%s|%\(\w+\)s")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUE_ROWS = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """Normalize ``sql`` so statements that differ only in values compare equal."""
+    sql = _COMMENTS.sub(" ", sql)
+    sql = _STRINGS.sub("?", sql)
+    sql = _PLACEHOLDERS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _LISTS.sub("(...)", sql)
+    sql = _VALUE_ROWS.sub(r"\1", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def fingerprint_id(fp: str) -> str:
+    return hashlib.sha1(fp.encode("utf-8")).hexdigest()[:12]
+
+
+def redact(args) -> str:
+    """Describe query arguments by type only, e.g. ``(<int>, <str:8>)``."""
+    if args is None:
+        return "()"
+    if isinstance(args, dict):
+        return "{" + ", ".join(f"{k}: {redact((v,))[1:-1]}" for k, v in args.items()) + "}"
+    if not isinstance(args, (list, tuple)):
+        args = (args,)
+    parts = []
+    for value in args:
+        if isinstance(value, (str, bytes)):
+            parts.append(f"<{type(value).__name__}:{len(value)}>")
+        elif isinstance(value, (list, tuple)):
+            parts.append(f"<{type(value).__name__}:{len(value)}>")
+        else:
+            parts.append(f"<{type(value).__name__}>")
+    return "(" + ", ".join(parts) + ")"
+
+
+class QueryProfiler:
+    """Aggregates statement timings by fingerprint.
+
+    At most ``max_fingerprints`` fingerprints are tracked; once full, new
+    ones are only counted under ``"untracked"``. The slowest call of every
+    fingerprint is kept in memory (never logged) so :meth:`top` can run
+    ``EXPLAIN`` on it.
+    """
+
+    def __init__(self, slow_ms: float = 200, max_fingerprints: int = 500, enabled: bool = True):
+        self.slow_ms = slow_ms
+        self.max_fingerprints = max_fingerprints
+        self.enabled = enabled
+        self._queries = {}
+        self._untracked = 0
+        self._lock = threading.Lock()
+
+    def configure(self, slow_ms=None, enabled=None, log_path=None) -> None:
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        if enabled is not None:
+            self.enabled = enabled
+        if log_path and not slow_logger.handlers:
+            handler = logging.FileHandler(log_path, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            slow_logger.addHandler(handler)
+
+    def record(self, query: str, args, elapsed_ms: float, rows: int = 1) -> None:
+        if isinstance(query, (bytes, bytearray)):
+            query = query.decode("utf-8", "replace")
+        fp = fingerprint(query)
+        with self._lock:
+            entry = self._queries.get(fp)
+            if entry is None:
+                if len(self._queries) >= self.max_fingerprints:
+                    self._untracked += 1
+                    entry = None
+                else:
+                    entry = self._queries[fp] = {
+                        "id": fingerprint_id(fp),
+                        "calls": 0,
+                        "rows": 0,
+                        "total_ms": 0.0,
+                        "max_ms": 0.0,
+                        "slow": 0,
+                        "example": None,
+                    }
+            if entry is not None:
+                entry["calls"] += 1
+                entry["rows"] += rows
+                entry["total_ms"] += elapsed_ms
+                if elapsed_ms > self.slow_ms:
+                    entry["slow"] += 1
+                if elapsed_ms >= entry["max_ms"]:
+                    entry["max_ms"] = elapsed_ms
+                    entry["example"] = (query, args)
+        if elapsed_ms > self.slow_ms:
+            slow_logger.warning(
+                "slow query %.1fms [%s] rows=%d %s args=%s",
+                elapsed_ms,
+                fingerprint_id(fp),
+                rows,
+                fp[:500],
+                redact(args),
+            )
+
+    def top(self, n: int = 20, conn=None, explain: int = 0) -> List[dict]:
+        """The ``n`` fingerprints with the most total time, slowest first.
+
+        With ``conn``, ``EXPLAIN`` is run for the slowest call of the first
+        ``explain`` SELECT fingerprints.
+        """
+        with self._lock:
+            ranked = sorted(self._queries.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:n]
+            ranked = [(fp, dict(entry)) for fp, entry in ranked]
+
+        result = []
+        explained = 0
+        for fp, entry in ranked:
+            example = entry.pop("example")
+            entry.update(
+                fingerprint=fp,
+                total_ms=round(entry["total_ms"], 2),
+                max_ms=round(entry["max_ms"], 2),
+                avg_ms=round(entry["total_ms"] / entry["calls"], 2) if entry["calls"] else 0,
+            )
+            if conn is not None and explained < explain and fp.upper().startswith("SELECT") and example:
+                entry["explain"] = self.explain(conn, *example)
+                explained += 1
+            result.append(entry)
+        return result
+
+    @staticmethod
+    def explain(conn, query: str, args) -> Optional[list]:
+        try:
+            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute("EXPLAIN " + query, args)
+                return cursor.fetchall()
+        except pymysql.MySQLError as e:
+            return [{"error": str(e)}]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "fingerprints": len(self._queries),
+                "untracked": self._untracked,
+                "calls": sum(e["calls"] for e in self._queries.values()),
+                "slow": sum(e["slow"] for e in self._queries.values()),
+                "total_ms": round(sum(e["total_ms"] for e in self._queries.values()), 2),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._queries.clear()
+            self._untracked = 0
+
+
+QUERY_PROFILER = QueryProfiler()
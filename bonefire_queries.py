@@ -0,0 +1,144 @@
+"""SQL run by the bot and the dashboard.
+
+Both services take their statements from here, and
+``python bonefire_migrate.py check`` runs ``EXPLAIN`` on the same text, so
+the index check follows whatever the app actually runs.
+"""
+
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+
+# ---------- Tracked embers / pyres ----------
+TRACKED_USER_IDS_SQL = "SELECT user_id FROM tracked_users"
+ENABLED_CHANNEL_IDS_SQL = "SELECT channel_id FROM tracked_channels WHERE enabled = TRUE"
+TRACKED_USERS_SQL = "SELECT user_id, username, nickname, role_name FROM tracked_users"
+ENABLED_CHANNELS_SQL = "SELECT channel_id, name FROM tracked_channels WHERE enabled = TRUE"
+
+TRACKED_USER_UPSERT = """
+    INSERT INTO tracked_users (user_id, username, nickname, role_name)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE username=VALUES(username), nickname=VALUES(nickname), role_name=VALUES(role_name)
+"""
+
+TRACKED_CHANNEL_UPSERT = """
+    INSERT INTO tracked_channels (channel_id, name)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE name=VALUES(name), enabled=TRUE
+"""
+
+DELETE_TRACKED_USER_SQL = "DELETE FROM tracked_users WHERE user_id = %s"
+UNTRACK_CHANNEL_SQL = "UPDATE tracked_channels SET enabled = FALSE WHERE channel_id = %s"
+
+# ---------- Voice sessions ----------
+UPSERT_SESSION_SQL = """
+    INSERT INTO voice_sessions (user_id, username, channel_id, channel_name, start_time, end_time, duration_sec)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        end_time = VALUES(end_time),
+        duration_sec = VALUES(duration_sec),
+        created_at = VALUES(end_time)
+"""
+
+DELETE_USER_SESSIONS_SQL = "DELETE FROM voice_sessions WHERE user_id = %s"
+DELETE_USER_ROLLUP_SQL = "DELETE FROM voice_rollup_hourly WHERE user_id = %s"
+
+
+def stored_sessions_query(keys: Iterable[Tuple[int, datetime]]) -> Tuple[str, list]:
+    """Read the stored ``(user_id, username, channel_id, start_time, end_time)`` of ``(user_id, start)`` keys."""
+    keys = list(keys)
+    where = " OR ".join(["(user_id = %s AND start_time = %s)"] * len(keys))
+    query = f"SELECT user_id, username, channel_id, start_time, end_time FROM voice_sessions WHERE {where}"
+    return query, [value for key in keys for value in key]
+
+
+# ---------- /flames ----------
+EMBER_LIST_SQL = "SELECT DISTINCT user_id, username FROM voice_sessions ORDER BY username"
+
+FLAMES_RANGE_SQL = """
+    SELECT username, start_time, end_time, duration_sec
+    FROM voice_sessions
+    WHERE user_id = %s AND start_time BETWEEN %s AND %s
+"""
+
+FLAMES_SUMMARY_SQL = """
+    SELECT user_id,
+           MAX(username),
+           SUM(seconds) AS total_seconds,
+           SUM(entries),
+           COUNT(DISTINCT CASE WHEN entries > 0 THEN bucket_date END)
+    FROM voice_rollup_hourly
+    GROUP BY user_id
+    ORDER BY total_seconds DESC
+"""
+
+FLAMES_HEATMAP_SQL = """
+    SELECT r.user_id, tu.username, tu.nickname, r.username, r.bucket_date, r.bucket_hour
+    FROM voice_rollup_hourly r
+    LEFT JOIN tracked_users tu ON r.user_id = tu.user_id
+    WHERE r.bucket_date >= %s
+"""
+
+# voice_rollup_hourly rows at or after a given clock hour
+ROLLUP_SINCE_SQL = "(bucket_date > %s OR (bucket_date = %s AND bucket_hour >= %s))"
+
+
+def rollup_since_args(start_time: datetime) -> Tuple:
+    return start_time.date(), start_time.date(), start_time.hour
+
+
+def flame_windows_query(since: Optional[datetime]) -> Tuple[str, tuple]:
+    """Rollup rows newest first, from the clock hour of ``since`` (all of them for None)."""
+    where = f"WHERE {ROLLUP_SINCE_SQL}" if since is not None else ""
+    query = f"""
+        SELECT user_id, bucket_date, bucket_hour, seconds
+        FROM voice_rollup_hourly
+        {where}
+        ORDER BY bucket_date DESC, bucket_hour DESC
+    """
+    return query, rollup_since_args(since) if since is not None else ()
+
+
+# ---------- Scars ----------
+INSERT_SCAR_SQL = """
+    INSERT INTO scar_notes (target_user_id, target_username, target_nickname, added_by_id, added_by_name, content)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+RECENT_SCARS_SQL = "SELECT content FROM scar_notes ORDER BY created_at DESC LIMIT 4"
+
+
+def like_prefix(value: str) -> str:
+    """``LIKE ... ESCAPE '\\'`` pattern matching strings that start with ``value``."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def scars_page_query(
+    limit: int, before: Optional[int] = None, target: str = "", reporter: str = "", search: str = ""
+) -> Tuple[str, tuple]:
+    """One ``/scars`` page, newest first, with the viewer's filters applied."""
+    conditions = []
+    args = []
+    if before:
+        conditions.append("id < %s")
+        args.append(before)
+    if target:
+        # prefix match, which can still range-scan the target index; usernames
+        # often contain "_", so wildcards in ``target`` are escaped
+        conditions.append("target_username LIKE %s ESCAPE '\\\\'")
+        args.append(like_prefix(target))
+    if reporter:
+        conditions.append("added_by_name = %s")
+        args.append(reporter)
+    if search:
+        conditions.append("MATCH(content, target_nickname) AGAINST (%s IN NATURAL LANGUAGE MODE)")
+        args.append(search)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT id, target_username, target_nickname, content, added_by_name
+        FROM scar_notes
+        {where}
+        ORDER BY id DESC
+        LIMIT %s
+    """
+    return query, (*args, limit)
@@ -0,0 +1,171 @@
+"""Hourly rollup of voice sessions for the /flames dashboards.
+
+The bot adds each finished session to ``voice_rollup_hourly`` as it writes
+it; ``python bonefire_rollup.py backfill`` rebuilds the table from
+``voice_sessions``.
+"""
+
+import argparse
+import logging
+from datetime import date, datetime
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pymysql
+
+from bonefire_analytics import EPOCH_DATE, epoch_day_to_date, split_hours, to_epoch_seconds
+from bonefire_config import load_config
+from bonefire_sqlite import SQLITE_PATH, connect as sqlite_connect
+
+
+BACKFILL_CHUNK = 5000
+
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO voice_rollup_hourly (user_id, channel_id, bucket_date, bucket_hour, username, seconds, entries)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        username = VALUES(username),
+        seconds = seconds + VALUES(seconds),
+        entries = entries + VALUES(entries)
+"""
+
+logger = logging.getLogger("bonefire_rollup")
+
+
+def rollup_rows(sessions: Iterable[tuple], since: Optional[date] = None) -> List[tuple]:
+    """Aggregate ``(user_id, username, channel_id, start, end)`` tuples into rollup rows.
+
+    Session time is split across the clock hours it covers and the entry is
+    counted in the start hour. Buckets before ``since`` are dropped, which
+    lets a partial backfill only rebuild recent dates.
+    """
+    sessions = list(sessions)
+    if not sessions:
+        return []
+    user_ids, usernames, channel_ids, starts, ends = zip(*sessions)
+    starts = to_epoch_seconds(starts)
+    session_idx, hour_idx, seconds = split_hours(starts, to_epoch_seconds(ends))
+    entries = (hour_idx == starts[session_idx] // 3600).astype(np.int64)
+    if since is not None:
+        keep = hour_idx // 24 >= (since - EPOCH_DATE).days
+        session_idx, hour_idx, seconds, entries = session_idx[keep], hour_idx[keep], seconds[keep], entries[keep]
+    if not len(session_idx):
+        return []
+
+    keys = np.stack(
+        [
+            np.array(user_ids, dtype=np.int64)[session_idx],
+            np.array(channel_ids, dtype=np.int64)[session_idx],
+            hour_idx,
+        ],
+        axis=1,
+    )
+    buckets, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    bucket_seconds = np.bincount(inverse, weights=seconds, minlength=len(buckets)).astype(np.int64)
+    bucket_entries = np.bincount(inverse, weights=entries, minlength=len(buckets)).astype(np.int64)
+    # label each bucket with the username of its latest piece
+    latest_piece = np.zeros(len(buckets), dtype=np.int64)
+    latest_piece[inverse] = np.arange(len(inverse))
+    names = [usernames[i] for i in session_idx[latest_piece].tolist()]
+
+    return [
+        (user_id, channel_id, epoch_day_to_date(hour // 24), hour % 24, name, total, count)
+        for (user_id, channel_id, hour), name, total, count in zip(
+            buckets.tolist(), names, bucket_seconds.tolist(), bucket_entries.tolist()
+        )
+    ]
+
+
+def rollup_delta(sessions: Iterable[tuple], previous: Iterable[tuple]) -> List[tuple]:
+    """Rollup rows that move ``voice_rollup_hourly`` from ``previous`` to ``sessions``.
+
+    Both hold ``(user_id, username, channel_id, start, end)`` tuples;
+    ``previous`` are the stored versions of sessions that are being
+    rewritten. A session rewritten unchanged adds nothing, so a retried
+    batch is never counted twice, and one that grew only adds the difference.
+    """
+    buckets = {}
+    for sign, group in ((-1, previous), (1, sessions)):
+        for user_id, channel_id, bucket_date, hour, name, seconds, entries in rollup_rows(group):
+            key = (user_id, channel_id, bucket_date, hour)
+            bucket = buckets.setdefault(key, [name, 0, 0])
+            if sign > 0:
+                bucket[0] = name
+            bucket[1] += sign * seconds
+            bucket[2] += sign * entries
+    return [(*key, name, seconds, entries) for key, (name, seconds, entries) in buckets.items() if seconds or entries]
+
+
+def backfill_query(since: Optional[date] = None):
+    """The sessions a backfill reads: all of them, or those ending on or after ``since``."""
+    query = "SELECT user_id, username, channel_id, start_time, end_time FROM voice_sessions"
+    if since is None:
+        return query, ()
+    return query + " WHERE end_time >= %s", (datetime.combine(since, datetime.min.time()),)
+
+
+def backfill(read_conn, write_conn, since: Optional[date] = None) -> int:
+    """Rebuild ``voice_rollup_hourly`` from ``voice_sessions`` in one transaction.
+
+    Sessions are streamed from ``read_conn`` in chunks; since the rollup
+    upsert adds to existing buckets, chunks that share a bucket sum up
+    correctly. Run it while the bot is stopped, otherwise sessions written
+    during the rebuild may be counted twice.
+    """
+    query, args = backfill_query(since)
+
+    count = 0
+    write_conn.begin()
+    try:
+        with read_conn.cursor(pymysql.cursors.SSCursor) as reader, write_conn.cursor() as writer:
+            if since is None:
+                writer.execute("DELETE FROM voice_rollup_hourly")
+            else:
+                writer.execute("DELETE FROM voice_rollup_hourly WHERE bucket_date >= %s", (since,))
+            reader.execute(query, args)
+            while True:
+                chunk = reader.fetchmany(BACKFILL_CHUNK)
+                if not chunk:
+                    break
+                rows = rollup_rows(chunk, since)
+                if rows:
+                    writer.executemany(UPSERT_ROLLUP_SQL, rows)
+                count += len(chunk)
+        write_conn.commit()
+    except Exception:
+        write_conn.rollback()
+        raise
+    return count
+
+
+def connect(config: dict):
+    if config.get("storage", "mysql") == "sqlite":
+        return sqlite_connect(config.get("sqlite_path", SQLITE_PATH), config.get("sqlite_pragmas"))
+    return pymysql.connect(**config["database"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = sub.add_parser("backfill", help="rebuild voice_rollup_hourly from voice_sessions")
+    backfill_parser.add_argument("--since", type=date.fromisoformat, help="only rebuild buckets from this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    config = load_config()
+    read_conn = connect(config)
+    write_conn = connect(config)
+    try:
+        count = backfill(read_conn, write_conn, args.since)
+    finally:
+        read_conn.close()
+        write_conn.close()
+    logger.info("🔥 rollup rebuilt from %s sessions", count)
+
+
+if __name__ == "__main__":  # pragma: no cover - manual utility
+    main()
@@ -0,0 +1,298 @@
+"""Embedded SQLite storage for single-node installs (``"storage": "sqlite"``).
+
+:class:`SQLitePool` is a drop-in for :class:`bonefire_db.ConnectionPool`:
+its connections and cursors take the same MySQL-dialect statements the bot
+and dashboard already run (``%s`` placeholders, ``ON DUPLICATE KEY UPDATE``,
+``INSERT IGNORE``, ``MATCH ... AGAINST``, ``ESCAPE '\\\\'``), translate them
+once per distinct statement and hand them to sqlite3, whose per-connection
+statement cache keeps them prepared. Statements are profiled under their original text, so
+``/stats/queries`` fingerprints are the same on both backends, and sqlite3
+errors are re-raised as the matching ``pymysql.err`` classes.
+
+The database file is opened in WAL mode, so the dashboard's reads never
+wait on the bot's writes. The schema, ``migrations/sqlite_schema.sql``, is
+applied when a pool opens its first connection.
+"""
+
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Optional
+
+import pymysql
+
+from bonefire_db import ConnectionPool
+from bonefire_profiler import QUERY_PROFILER
+
+
+SQLITE_PATH = "bonefire.sqlite3"
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations", "sqlite_schema.sql")
+# upserts without a conflict target need 3.35
+MIN_SQLITE_VERSION = (3, 35, 0)
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    # with WAL, NORMAL never corrupts the file; a power cut may drop the last commits
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -32768,  # KiB per connection
+    "mmap_size": 256 * 2**20,
+}
+
+# primary result codes after which the connection cannot be used any more;
+# only these become OperationalError, on which the pools discard the connection
+_CONNECTION_BROKEN = {
+    10,  # SQLITE_IOERR
+    14,  # SQLITE_CANTOPEN
+    26,  # SQLITE_NOTADB
+}
+_SQLITE_ERROR = 1  # SQL error or missing table / column
+
+_MATCH = re.compile(
+    r"MATCH\s*\(([^)]*)\)\s*AGAINST\s*\(\s*%s(?:\s+IN\s+NATURAL\s+LANGUAGE\s+MODE)?\s*\)", re.I
+)
+_UPSERT = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I)
+_VALUES_REF = re.compile(r"\bVALUES\s*\(\s*(\w+)\s*\)", re.I)
+_INSERT_IGNORE = re.compile(r"^(\s*)INSERT\s+IGNORE\b", re.I)
+_EXPLAIN = re.compile(r"^(\s*)EXPLAIN\s+(?!QUERY\s+PLAN\b)", re.I)
+_PARAMS = re.compile(r"%s|%%")
+# MySQL string literals take backslash escapes, so its '\\' is one backslash
+_ESCAPE_BACKSLASH = re.compile(r"\bESCAPE\s+'\\\\'", re.I)
+
+
+def _adapt_datetime(value: datetime) -> str:
+    # PyMySQL drops tzinfo too; DATETIME columns hold local wall-clock time
+    return value.replace(tzinfo=None).isoformat(" ", "seconds")
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_converter("DATETIME", lambda v: datetime.fromisoformat(v.decode()))
+sqlite3.register_converter("DATE", lambda v: date.fromisoformat(v.decode()))
+
+
+@lru_cache(maxsize=1024)
+def translate(sql: str) -> str:
+    """Rewrite a MySQL-dialect statement for SQLite."""
+    sql = _MATCH.sub(r"bonefire_match(%s, \1)", sql)
+    upsert = _UPSERT.search(sql)
+    if upsert:
+        tail = _VALUES_REF.sub(r"excluded.\1", sql[upsert.end():])
+        sql = sql[: upsert.start()] + "ON CONFLICT DO UPDATE SET" + tail
+    sql = _INSERT_IGNORE.sub(r"\1INSERT OR IGNORE", sql)
+    sql = _EXPLAIN.sub(r"\1EXPLAIN QUERY PLAN ", sql)
+    sql = _ESCAPE_BACKSLASH.sub(r"ESCAPE '\\'", sql)
+    return _PARAMS.sub(lambda m: "?" if m.group() == "%s" else "%", sql)
+
+
+def _match(query, *columns) -> int:
+    """``MATCH(columns) AGAINST (query)``: whether any word of ``query`` occurs in any column."""
+    words = str(query or "").casefold().split()
+    text = "\n".join(str(c) for c in columns if c is not None).casefold()
+    return int(any(word in text for word in words))
+
+
+def _params(args) -> tuple:
+    if args is None:
+        return ()
+    if isinstance(args, (list, tuple)):
+        return tuple(args)
+    return (args,)
+
+
+def _mysql_error(e: sqlite3.Error) -> type:
+    """The ``pymysql.err`` class MySQL would raise for the same failure."""
+    code = getattr(e, "sqlite_errorcode", 0) & 0xFF
+    if code in _CONNECTION_BROKEN:
+        return pymysql.err.OperationalError
+    if isinstance(e, sqlite3.IntegrityError):
+        return pymysql.err.IntegrityError
+    if isinstance(e, sqlite3.ProgrammingError) or (isinstance(e, sqlite3.OperationalError) and code == _SQLITE_ERROR):
+        return pymysql.err.ProgrammingError
+    # busy, locked, full, ...: the connection is still fine
+    return pymysql.err.DatabaseError
+
+
+@contextmanager
+def _mysql_errors():
+    try:
+        yield
+    except sqlite3.Error as e:
+        raise _mysql_error(e)(getattr(e, "sqlite_errorcode", 0), str(e)) from e
+
+
+class SQLiteCursor:
+    """PyMySQL-style cursor over a sqlite3 cursor; rows are tuples, or dicts for a ``DictCursor``."""
+
+    def __init__(self, cursor: sqlite3.Cursor, as_dict: bool = False):
+        self._cursor = cursor
+        self._as_dict = as_dict
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            with _mysql_errors():
+                self._cursor.execute(translate(query), _params(args))
+        finally:
+            if QUERY_PROFILER.enabled:
+                QUERY_PROFILER.record(query, args, (time.perf_counter() - started) * 1000, max(self.rowcount, 0))
+        return max(self.rowcount, 0)
+
+    def executemany(self, query, args):
+        if not args:
+            return 0
+        started = time.perf_counter()
+        try:
+            with _mysql_errors():
+                self._cursor.executemany(translate(query), [_params(row) for row in args])
+        finally:
+            if QUERY_PROFILER.enabled:
+                QUERY_PROFILER.record(query, args[0], (time.perf_counter() - started) * 1000, len(args))
+        return max(self.rowcount, 0)
+
+    def _row(self, row):
+        if row is None or not self._as_dict:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        with _mysql_errors():
+            return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=None):
+        with _mysql_errors():
+            rows = self._cursor.fetchmany(size or self._cursor.arraysize)
+        return [self._row(row) for row in rows] if self._as_dict else rows
+
+    def fetchall(self):
+        with _mysql_errors():
+            rows = self._cursor.fetchall()
+        return [self._row(row) for row in rows] if self._as_dict else rows
+
+    def __iter__(self):
+        return (self._row(row) for row in self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+    """PyMySQL-style connection to a SQLite file.
+
+    Statements autocommit unless :meth:`begin` opened a transaction, which
+    takes the write lock up front (``BEGIN IMMEDIATE``) so concurrent
+    writers queue on ``busy_timeout`` instead of failing on lock upgrade.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH, pragmas: Optional[dict] = None, timeout: float = 10):
+        with _mysql_errors():
+            self._conn = sqlite3.connect(
+                path,
+                timeout=timeout,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE,
+            )
+            self._conn.create_function("bonefire_match", -1, _match, deterministic=True)
+            for name, value in {**PRAGMAS, **(pragmas or {})}.items():
+                self._conn.execute(f"PRAGMA {name} = {value}")
+        self.open = True
+
+    def cursor(self, cursor=None) -> SQLiteCursor:
+        """``cursor`` is a PyMySQL cursor class; only whether it returns dicts matters here."""
+        as_dict = isinstance(cursor, type) and issubclass(cursor, pymysql.cursors.DictCursorMixin)
+        return SQLiteCursor(self._conn.cursor(), as_dict)
+
+    def executescript(self, script: str) -> None:
+        with _mysql_errors():
+            self._conn.executescript(script)
+
+    def begin(self) -> None:
+        with _mysql_errors():
+            self._conn.execute("BEGIN IMMEDIATE")
+
+    def commit(self) -> None:
+        if self._conn.in_transaction:
+            with _mysql_errors():
+                self._conn.execute("COMMIT")
+
+    def rollback(self) -> None:
+        if self._conn.in_transaction:
+            with _mysql_errors():
+                self._conn.execute("ROLLBACK")
+
+    def ping(self, reconnect=False) -> None:
+        with _mysql_errors():
+            self._conn.execute("SELECT 1").fetchone()
+
+    def close(self) -> None:
+        if not self.open:
+            return
+        self.open = False
+        try:
+            self._conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        self._conn.close()
+
+
+def connect(path: str = SQLITE_PATH, pragmas: Optional[dict] = None, timeout: float = 10) -> SQLiteConnection:
+    """Open ``path`` (created if missing) and apply the schema."""
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        raise RuntimeError(f"SQLite {sqlite3.sqlite_version} is too old, 3.35 or newer is needed")
+    conn = SQLiteConnection(path, pragmas, timeout)
+    try:
+        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+class SQLitePool(ConnectionPool):
+    """:class:`ConnectionPool` of :class:`SQLiteConnection` objects to one file.
+
+    Takes the same sizing options. The schema is applied by the first
+    connection only; a pooled connection is used by one thread at a time,
+    which is all sqlite3 requires of connections shared across threads.
+    ``path`` must be a file: every ``":memory:"`` connection would get a
+    database of its own.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH, pragmas: Optional[dict] = None, **pool_options):
+        super().__init__(**pool_options)
+        self._path = path
+        self._pragmas = pragmas
+        self._schema_ready = False
+
+    def _open_connection(self):
+        if self._schema_ready:
+            return SQLiteConnection(self._path, self._pragmas, self._timeout)
+        conn = connect(self._path, self._pragmas, self._timeout)
+        self._schema_ready = True
+        return conn
@@ -0,0 +1,38 @@
+-- Base tables the bot and dashboard read and write. Existing installs
+-- already have them; IF NOT EXISTS leaves those untouched.
+
+CREATE TABLE IF NOT EXISTS tracked_users (
+  user_id    BIGINT       NOT NULL PRIMARY KEY,
+  username   VARCHAR(100) NOT NULL,
+  nickname   VARCHAR(100) NULL,
+  role_name  VARCHAR(100) NULL
+) DEFAULT CHARSET = utf8mb4;
+
+CREATE TABLE IF NOT EXISTS tracked_channels (
+  channel_id BIGINT       NOT NULL PRIMARY KEY,
+  name       VARCHAR(100) NOT NULL,
+  enabled    BOOLEAN      NOT NULL DEFAULT TRUE
+) DEFAULT CHARSET = utf8mb4;
+
+CREATE TABLE IF NOT EXISTS voice_sessions (
+  id           BIGINT       NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  user_id      BIGINT       NOT NULL,
+  username     VARCHAR(100) NOT NULL,
+  channel_id   BIGINT       NOT NULL,
+  channel_name VARCHAR(100) NOT NULL,
+  start_time   DATETIME     NOT NULL,
+  end_time     DATETIME     NOT NULL,
+  duration_sec INT          NOT NULL,
+  created_at   DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP
+) DEFAULT CHARSET = utf8mb4;
+
+CREATE TABLE IF NOT EXISTS scar_notes (
+  id              BIGINT       NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  target_user_id  VARCHAR(32)  NOT NULL,
+  target_username VARCHAR(100) NOT NULL,
+  target_nickname VARCHAR(100) NULL,
+  added_by_id     VARCHAR(32)  NOT NULL,
+  added_by_name   VARCHAR(100) NOT NULL,
+  content         TEXT         NOT NULL,
+  created_at      DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP
+) DEFAULT CHARSET = utf8mb4;
@@ -0,0 +1,14 @@
+-- Make (user_id, start_time) unique so session writes can be a single upsert.
+-- Rows that already collide are collapsed first, keeping the longest session
+-- (ties go to the newest row).
+
+DELETE vs
+FROM voice_sessions vs
+JOIN voice_sessions keep
+  ON keep.user_id = vs.user_id
+ AND keep.start_time = vs.start_time
+ AND (keep.duration_sec > vs.duration_sec
+      OR (keep.duration_sec = vs.duration_sec AND keep.id > vs.id));
+
+ALTER TABLE voice_sessions
+  ADD UNIQUE KEY uq_voice_sessions_user_start (user_id, start_time);
@@ -0,0 +1,16 @@
+-- Hourly rollup of voice_sessions used by the /flames dashboards.
+-- Session time is split across the clock hours it covers; entries are
+-- counted in the hour the session started. Fill it with:
+--   python bonefire_rollup.py backfill
+
+CREATE TABLE IF NOT EXISTS voice_rollup_hourly (
+  user_id      BIGINT       NOT NULL,
+  channel_id   BIGINT       NOT NULL,
+  bucket_date  DATE         NOT NULL,
+  bucket_hour  TINYINT      NOT NULL,
+  username     VARCHAR(100) NOT NULL,
+  seconds      INT          NOT NULL DEFAULT 0,
+  entries      INT          NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, channel_id, bucket_date, bucket_hour),
+  KEY idx_voice_rollup_bucket (bucket_date, bucket_hour)
+) DEFAULT CHARSET = utf8mb4;
@@ -0,0 +1,7 @@
+-- Indexes behind the paginated, searchable /scars viewer.
+-- The ngram parser lets full-text search match Korean text without spaces.
+-- One index per statement, so a rerun only skips the ones that exist.
+
+ALTER TABLE scar_notes ADD KEY idx_scar_notes_target (target_username, id);
+ALTER TABLE scar_notes ADD KEY idx_scar_notes_reporter (added_by_name, id);
+ALTER TABLE scar_notes ADD FULLTEXT KEY ft_scar_notes_search (content, target_nickname) WITH PARSER ngram;
@@ -0,0 +1,9 @@
+-- Version counters the dashboard uses to invalidate its /flames cache.
+-- The bot bumps 'sessions' whenever it writes finished sessions.
+
+CREATE TABLE IF NOT EXISTS data_versions (
+  name     VARCHAR(32)     NOT NULL PRIMARY KEY,
+  version  BIGINT UNSIGNED NOT NULL DEFAULT 0
+) DEFAULT CHARSET = utf8mb4;
+
+INSERT IGNORE INTO data_versions (name, version) VALUES ('sessions', 0);
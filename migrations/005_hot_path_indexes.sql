@@ -0,0 +1,16 @@
+-- Indexes for the remaining hot queries (see `python bonefire_migrate.py check`).
+-- voice_sessions (user_id, start_time) is already covered by 001's unique key.
+-- One index per statement, so a rerun only skips the ones that exist.
+
+-- time-range scans over all sessions, e.g. rollup backfills since a date
+ALTER TABLE voice_sessions ADD KEY idx_voice_sessions_start (start_time);
+ALTER TABLE voice_sessions ADD KEY idx_voice_sessions_end (end_time);
+
+-- /flames ember list: SELECT DISTINCT user_id, username ... ORDER BY username
+ALTER TABLE voice_sessions ADD KEY idx_voice_sessions_username (username, user_id);
+
+-- registry load, /pyres and /kindle: WHERE enabled = TRUE
+ALTER TABLE tracked_channels ADD KEY idx_tracked_channels_enabled (enabled, channel_id);
+
+-- /glance_the_embers: ORDER BY created_at DESC LIMIT 4
+ALTER TABLE scar_notes ADD KEY idx_scar_notes_created (created_at);
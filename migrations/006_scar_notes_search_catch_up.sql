@@ -0,0 +1,8 @@
+-- 003 used to add its three indexes in one ALTER TABLE. Where one of them
+-- already existed, the whole statement was skipped as already applied and
+-- 003 was recorded without the others. Add each again; the ones that exist
+-- are skipped.
+
+ALTER TABLE scar_notes ADD KEY idx_scar_notes_target (target_username, id);
+ALTER TABLE scar_notes ADD KEY idx_scar_notes_reporter (added_by_name, id);
+ALTER TABLE scar_notes ADD FULLTEXT KEY ft_scar_notes_search (content, target_nickname) WITH PARSER ngram;
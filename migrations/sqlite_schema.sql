@@ -0,0 +1,73 @@
+-- Schema of the embedded SQLite backend (storage: "sqlite"), matching the
+-- MySQL tables and indexes of migrations 000-006. Applied with IF NOT EXISTS
+-- every time a SQLitePool opens its first connection; keep it in step with
+-- new MySQL migrations.
+--
+-- DATETIME and DATE columns hold ISO text ("2026-01-01 20:00:00"), which
+-- sorts and compares like the MySQL types; bonefire_sqlite converts them.
+
+CREATE TABLE IF NOT EXISTS tracked_users (
+  user_id    INTEGER NOT NULL PRIMARY KEY,
+  username   TEXT    NOT NULL,
+  nickname   TEXT    NULL,
+  role_name  TEXT    NULL
+);
+
+CREATE TABLE IF NOT EXISTS tracked_channels (
+  channel_id INTEGER NOT NULL PRIMARY KEY,
+  name       TEXT    NOT NULL,
+  enabled    BOOLEAN NOT NULL DEFAULT TRUE
+);
+CREATE INDEX IF NOT EXISTS idx_tracked_channels_enabled ON tracked_channels (enabled, channel_id);
+
+CREATE TABLE IF NOT EXISTS voice_sessions (
+  id           INTEGER  NOT NULL PRIMARY KEY AUTOINCREMENT,
+  user_id      INTEGER  NOT NULL,
+  username     TEXT     NOT NULL,
+  channel_id   INTEGER  NOT NULL,
+  channel_name TEXT     NOT NULL,
+  start_time   DATETIME NOT NULL,
+  end_time     DATETIME NOT NULL,
+  duration_sec INTEGER  NOT NULL,
+  created_at   DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_voice_sessions_user_start ON voice_sessions (user_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_voice_sessions_start ON voice_sessions (start_time);
+CREATE INDEX IF NOT EXISTS idx_voice_sessions_end ON voice_sessions (end_time);
+CREATE INDEX IF NOT EXISTS idx_voice_sessions_username ON voice_sessions (username, user_id);
+
+CREATE TABLE IF NOT EXISTS voice_rollup_hourly (
+  user_id      INTEGER NOT NULL,
+  channel_id   INTEGER NOT NULL,
+  bucket_date  DATE    NOT NULL,
+  bucket_hour  INTEGER NOT NULL,
+  username     TEXT    NOT NULL,
+  seconds      INTEGER NOT NULL DEFAULT 0,
+  entries      INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, channel_id, bucket_date, bucket_hour)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_voice_rollup_bucket ON voice_rollup_hourly (bucket_date, bucket_hour);
+
+-- full-text search over content and target_nickname is a substring match
+-- (bonefire_match), standing in for MySQL's ngram FULLTEXT index
+CREATE TABLE IF NOT EXISTS scar_notes (
+  id              INTEGER  NOT NULL PRIMARY KEY AUTOINCREMENT,
+  target_user_id  TEXT     NOT NULL,
+  target_username TEXT     NOT NULL,
+  target_nickname TEXT     NULL,
+  added_by_id     TEXT     NOT NULL,
+  added_by_name   TEXT     NOT NULL,
+  content         TEXT     NOT NULL,
+  created_at      DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+-- NOCASE, so the target filter's LIKE prefix match can use it
+DROP INDEX IF EXISTS idx_scar_notes_target;
+CREATE INDEX IF NOT EXISTS idx_scar_notes_target_prefix ON scar_notes (target_username COLLATE NOCASE, id);
+CREATE INDEX IF NOT EXISTS idx_scar_notes_reporter ON scar_notes (added_by_name, id);
+CREATE INDEX IF NOT EXISTS idx_scar_notes_created ON scar_notes (created_at);
+
+CREATE TABLE IF NOT EXISTS data_versions (
+  name     TEXT    NOT NULL PRIMARY KEY,
+  version  INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO data_versions (name, version) VALUES ('sessions', 0);